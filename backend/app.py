@@ -1,6 +1,26 @@
-from fastapi import FastAPI, WebSocket
+import os
+import shutil
+import asyncio
+import uvicorn
+from fastapi import FastAPI, WebSocket, Request, HTTPException, Header
+from fastapi.responses import FileResponse, JSONResponse
+from starlette.background import BackgroundTask
 from fastapi.middleware.cors import CORSMiddleware
-from backend.inference_streamlit import main_loop_websocket
+# Only light modules are imported here: models load on first use and
+# Streamlit/PyAudio are never imported by the API server.
+from backend.session import main_loop_websocket, drain_sessions, sessions
+from backend.warmup import readiness, warm_up
+from backend.models import transcribe_whisper, WHISPER_MODEL_NAME
+from backend.cascade import recognize, stats as cascade_stats
+from backend.scheduler import scheduler, SchedulerBusy, PRIORITY_CONFIRM, PRIORITY_COMMAND, PRIORITY_BATCH
+from backend.profiling import profiler, ProfilerBusy
+from utils.flight_recorder import get_recorder
+
+# Set to require an X-Admin-Token header on /admin routes
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+# Seconds shutdown waits for sessions to finish the command they are on
+DRAIN_TIMEOUT = float(os.environ.get("DRAIN_TIMEOUT", "30"))
+LOOPBACK_HOSTS = ("127.0.0.1", "::1", "localhost")
 
 app = FastAPI()
 
@@ -12,10 +32,156 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# === Lifecycle ===
+# Warm-up runs on the inference threads in the background, so /health answers
+# at once while /ready, /ws and /transcribe wait for the models.
+@app.on_event("startup")
+async def start_warm_up():
+    asyncio.get_running_loop().run_in_executor(scheduler.executor, warm_up)
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+@app.get("/ready")
+async def ready():
+    report = readiness.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
+    # While draining, a client resuming its session may still finish its command
+    if not readiness.report()["ready"] and websocket.query_params.get("session") not in sessions:
+        await websocket.accept()
+        await websocket.send_text('{"seq": 1, "type": "busy", "text": "Server starting. Try again shortly."}')
+        await websocket.close(code=1013)  # Try Again Later
+        return
     await main_loop_websocket(websocket)
 
+TRANSCRIBE_PRIORITY = {"confirm": PRIORITY_CONFIRM, "command": PRIORITY_COMMAND, "batch": PRIORITY_BATCH}
+TRANSCRIBE_DEADLINE = {"confirm": 5, "command": 10, "batch": None}
+SAMPLE_WIDTH = {"int16": 2, "float32": 4}
+
+# Central transcription endpoint for edge agents (inference/edge_agent.py).
+# Body is raw PCM of one post-trigger utterance; anything other than 16 kHz mono
+# int16 is downmixed/resampled in-process (utils/resample.py), no ffmpeg needed.
+@app.post("/transcribe")
+async def transcribe_endpoint(request: Request, mode: str = "command",
+                              rate: int = 16000, channels: int = 1, dtype: str = "int16"):
+    if mode not in TRANSCRIBE_PRIORITY:
+        raise HTTPException(status_code=400, detail=f"Unknown mode: {mode}")
+    if not readiness.report()["ready"]:
+        raise HTTPException(status_code=503, detail="not ready")
+    pcm = await request.body()
+    if not pcm:
+        raise HTTPException(status_code=400, detail="Empty audio payload")
+    if dtype not in SAMPLE_WIDTH or channels < 1:
+        raise HTTPException(status_code=400, detail=f"Unsupported sample format: {dtype} x {channels}")
+    # A truncated body is the client's fault: 400, not a 500 that makes edge agents fail over
+    if len(pcm) % (SAMPLE_WIDTH[dtype] * channels):
+        raise HTTPException(status_code=400, detail="Audio payload is not a whole number of frames")
+    if (rate, channels, dtype) != (16000, 1, "int16"):
+        from utils.resample import AudioNormalizer, to_int16_bytes
+        # Format conversion only: gain stays as captured, like native 16 kHz uploads,
+        # so the cascade's silence gate and confidence thresholds see the same levels
+        try:
+            normalizer = AudioNormalizer(rate, channels, dtype, normalize_gain=False)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        pcm = to_int16_bytes(normalizer.process(pcm))
+    # Batch jobs get the full model; live utterances go through the recognizer cascade
+    # Batch decodes on its own model instance, so it never blocks live decodes
+    fn, args = (transcribe_whisper, ([pcm], WHISPER_MODEL_NAME, "batch")) if mode == "batch" else (recognize, ([pcm], mode))
+    try:
+        result = await scheduler.run(fn, *args,
+                                     priority=TRANSCRIBE_PRIORITY[mode], deadline=TRANSCRIBE_DEADLINE[mode])
+    except SchedulerBusy as e:
+        # 503 makes edge agents fail over to another server
+        raise HTTPException(status_code=503, detail=f"busy: {e}")
+    if mode == "batch":
+        return {"transcript": result}
+    client = request.headers.get("x-edge-id") or (request.client.host if request.client else "unknown")
+    get_recorder().record(f"edge:{client}", mode, audio=pcm, transcript=result["transcript"],
+                          tier=result["tier"], score=result["score"], match=result["match"])
+    key = "decision" if mode == "confirm" else "command"
+    return {"transcript": result["transcript"], key: result["match"], "tier": result["tier"]}
+
+def check_admin(token):
+    if ADMIN_TOKEN and token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+# Routes that change or load the server never fail open: without ADMIN_TOKEN
+# they only answer on loopback (the server binds 0.0.0.0 with CORS *).
+def check_admin_action(request, token):
+    if ADMIN_TOKEN:
+        check_admin(token)
+    elif request.client is None or request.client.host not in LOOPBACK_HOSTS:
+        raise HTTPException(status_code=403, detail="Set ADMIN_TOKEN to use this route remotely")
+
+# Rolling restarts: stop taking new commands (/ready turns 503), let sessions
+# finish the one they are on, then write out the flight recorder's queue.
+# uvicorn closes every websocket (1012) before this hook runs, so on its own it
+# only settles server-side state; DrainingServer (python backend/app.py) drains
+# on SIGTERM while clients are still connected. Under the plain uvicorn CLI,
+# call POST /admin/drain before stopping the process.
+@app.on_event("shutdown")
+async def drain():
+    readiness.draining = True
+    result = await drain_sessions(DRAIN_TIMEOUT)
+    print(f"🛑 Drained sessions: {result}")
+    get_recorder().close()
+
+# Call before stopping the process (e.g. a preStop hook) so clients still
+# connected get their final events; returns once sessions are drained.
+@app.post("/admin/drain")
+async def admin_drain(request: Request, timeout: float = DRAIN_TIMEOUT, x_admin_token: str = Header(None)):
+    check_admin_action(request, x_admin_token)
+    readiness.draining = True
+    return await drain_sessions(timeout)
+
+@app.get("/admin/scheduler")
+async def scheduler_stats(x_admin_token: str = Header(None)):
+    check_admin(x_admin_token)
+    return scheduler.stats()
+
+# Per-tier hit rates and latency of the recognizer cascade
+@app.get("/admin/cascade")
+async def cascade_report(x_admin_token: str = Header(None)):
+    check_admin(x_admin_token)
+    return cascade_stats.snapshot()
+
+# Captures a torch profiler trace of each Whisper call plus sampled Python stacks of
+# all threads for `seconds`, returned as a zip (chrome traces, stacks.folded, hotspots.json).
+@app.get("/admin/profile")
+async def profile(request: Request, seconds: float = 10, x_admin_token: str = Header(None)):
+    check_admin_action(request, x_admin_token)
+    try:
+        archive = await profiler.capture(seconds)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return FileResponse(archive, media_type="application/zip", filename=os.path.basename(archive),
+                        background=BackgroundTask(shutil.rmtree, os.path.dirname(archive), ignore_errors=True))
+
+class DrainingServer(uvicorn.Server):
+    """uvicorn server that drains sessions on the first SIGTERM/SIGINT, before
+    connections are closed; a second signal exits immediately."""
+
+    async def serve(self, sockets=None):
+        self.loop = asyncio.get_running_loop()
+        await super().serve(sockets)
+
+    def handle_exit(self, sig, frame):
+        if readiness.draining or getattr(self, "loop", None) is None:
+            return super().handle_exit(sig, frame)
+        readiness.draining = True
+        print("🛑 Draining sessions before shutdown...")
+        self.loop.call_soon_threadsafe(lambda: asyncio.ensure_future(self.drain_then_exit(sig, frame)))
+
+    async def drain_then_exit(self, sig, frame):
+        result = await drain_sessions(DRAIN_TIMEOUT)
+        print(f"🛑 Drained sessions: {result}")
+        super().handle_exit(sig, frame)
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("backend.app:app", host="0.0.0.0", port=8000, reload=False)
\ No newline at end of file
+    config = uvicorn.Config("backend.app:app", host="0.0.0.0", port=8000, reload=False, ws_per_message_deflate=True)
+    DrainingServer(config).run()
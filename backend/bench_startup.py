@@ -0,0 +1,111 @@
+# bench_startup.py
+#
+# Tracks API cold start: a `python -X importtime` breakdown of `import backend.app`
+# plus time from launching uvicorn to the first accepted connection (/health) and,
+# with --ready, to the end of model warm-up (/ready). Each run is appended to
+# data/output/startup_bench.jsonl so regressions show up over time.
+#
+#   python backend/bench_startup.py [--ready] [--ws]
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+import urllib.request
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUTPUT_FILE = os.path.join(BASE_DIR, "data", "output", "startup_bench.jsonl")
+
+# Modules the API server must not import at startup
+HEAVY_MODULES = ("torch", "whisper", "streamlit", "pyaudio", "vosk", "numpy")
+TOP_N = 15
+STARTUP_TIMEOUT = 60
+READY_TIMEOUT = 600  # warm-up loads and exercises every Whisper model
+
+def import_breakdown(module="backend.app"):
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=BASE_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        # "import time:   self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        })
+    top_level = [r for r in rows if r["depth"] == 0]
+    # Depth 1 = modules imported directly by the target (and by site at interpreter start)
+    direct = [r for r in rows if r["depth"] <= 1 and r["module"] != module]
+    loaded = {r["module"].split(".")[0] for r in rows}
+    return {
+        "total_ms": round(sum(r["cumulative_ms"] for r in top_level), 1),
+        "top": sorted(direct, key=lambda r: r["cumulative_ms"], reverse=True)[:TOP_N],
+        "heavy_imported": [m for m in HEAVY_MODULES if m in loaded],
+    }
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def wait_for(url, started, timeout):
+    while time.perf_counter() - started < timeout:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return round((time.perf_counter() - started) * 1000, 1)
+        except OSError:  # refused, or 503 until ready
+            time.sleep(0.02)
+    raise RuntimeError(f"{url} did not answer within {timeout}s")
+
+def time_to_first_connection(use_ws=False, use_ready=False):
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "backend.app:app", "--port", str(port)],
+                              cwd=BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    result = {}
+    try:
+        result["first_http_ms"] = wait_for(f"http://127.0.0.1:{port}/health", started, STARTUP_TIMEOUT)
+        if use_ready or use_ws:
+            # /ws turns connections away until warm-up is done
+            result["ready_ms"] = wait_for(f"http://127.0.0.1:{port}/ready", started, READY_TIMEOUT)
+        if use_ws:
+            from websocket import create_connection
+            ws = create_connection(f"ws://127.0.0.1:{port}/ws", timeout=STARTUP_TIMEOUT)
+            ws.recv()
+            result["first_ws_message_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            ws.close()
+    finally:
+        server.terminate()
+        server.wait()
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure FastAPI server cold start")
+    parser.add_argument("--ready", action="store_true", help="Also time model warm-up until /ready")
+    parser.add_argument("--ws", action="store_true", help="Also time the first /ws message (opens the microphone)")
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    imports = import_breakdown()
+    print(f"📦 import backend.app: {imports['total_ms']} ms")
+    for row in imports["top"]:
+        print(f"   {row['cumulative_ms']:9.1f} ms  {row['module']}")
+    if imports["heavy_imported"]:
+        print(f"⚠️ Heavy modules imported at startup: {', '.join(imports['heavy_imported'])}")
+
+    connection = time_to_first_connection(args.ws, args.ready)
+    for key, value in connection.items():
+        print(f"⏱️ {key}: {value} ms")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"timestamp": time.time(), "imports": imports, **connection}) + "\n")
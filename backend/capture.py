@@ -0,0 +1,27 @@
+# Capture layer: server-side microphone feeding audio_queue.
+# pyaudio is imported only when a stream is opened.
+
+import queue
+
+# Audio config
+RATE = 16000
+CHUNK = 1024
+CHANNELS = 1
+
+audio_queue = queue.Queue()
+
+def audio_callback(in_data, frame_count, time_info, status):
+    import pyaudio
+    audio_queue.put(in_data)
+    return (None, pyaudio.paContinue)
+
+def start_microphone_stream():
+    import pyaudio
+    p = pyaudio.PyAudio()
+    # (Optional) You can still print device info for debugging, but it's not required
+    # for i in range(p.get_device_count()):
+    #     print(p.get_device_info_by_index(i))
+    stream = p.open(format=pyaudio.paInt16, channels=CHANNELS, rate=RATE, input=True,
+                    frames_per_buffer=CHUNK, stream_callback=audio_callback)
+    stream.start_stream()
+    return stream
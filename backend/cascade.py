@@ -0,0 +1,164 @@
+# Confidence-driven recognizer cascade for post-trigger utterances:
+#
+#   silence check -> Vosk restricted to the command grammar -> Whisper tiny -> Whisper medium
+#
+# Each tier answers only when it is confident and its text matches the closed
+# command list (or confirm/cancel); otherwise the clip escalates. Most cockpit
+# commands stop at the first or second tier, so the large model only runs on
+# hard cases.
+
+import os
+import json
+import time
+import string
+import functools
+import threading
+
+from backend.commands import load_commands, match_command_scored, parse_confirmation
+from backend.models import get_recognizer_pool, transcribe_whisper_result, WHISPER_MODEL_NAME
+from backend.profiling import timed
+
+# === Config ===
+FAST_WHISPER_MODEL = os.environ.get("WHISPER_FAST_MODEL", "tiny")
+MIN_RMS = 0.004                 # frame RMS (float scale) counted as speech energy
+MIN_SPEECH_FRACTION = 0.05      # clips with fewer energetic frames are rejected as silence
+ENERGY_FRAME = 480              # 30 ms at 16 kHz
+VOSK_MIN_CONFIDENCE = 0.85      # mean per-word confidence
+WHISPER_MIN_LOGPROB = -0.5      # mean segment avg_logprob
+NO_SPEECH_REJECT = 0.6          # no_speech_prob above this (with a low logprob) means silence
+MATCH_ACCEPT = 0.8              # command match score needed to stop at a fast tier
+
+CONFIRM_GRAMMAR = ["confirm", "cancel", "[unk]"]
+
+# === Stats ===
+class CascadeStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.silence = 0
+        self.tiers = {}
+
+    def record(self, tier, accepted, seconds):
+        with self.lock:
+            attempts, hits, total = self.tiers.get(tier, (0, 0, 0.0))
+            self.tiers[tier] = (attempts + 1, hits + int(accepted), total + seconds)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "rejected_silence": self.silence,
+                "tiers": {
+                    tier: {
+                        "attempts": attempts,
+                        "accepted": hits,
+                        "hit_rate": round(hits / attempts, 3) if attempts else None,
+                        "mean_ms": round(1000 * total / attempts, 1) if attempts else None,
+                    }
+                    for tier, (attempts, hits, total) in self.tiers.items()
+                },
+            }
+
+stats = CascadeStats()
+
+# === Tiers ===
+def grammar_phrase(cmd):
+    """Spoken form of a command for the Vosk grammar, or None if it has no safe one.
+
+    Hyphenated words are split ("before-takeoff" -> "before takeoff"). Commands
+    with numbers ("Tune COM1 to 121.5.") are left out on purpose: dropping the
+    digits would leave a phrase ("tune to") that maps to the wrong command, and
+    a spelled-out form doesn't match the command text. They go to Whisper.
+    """
+    words = [w.strip(string.punctuation).lower() for w in cmd.replace("-", " ").split()]
+    if any(ch.isdigit() for w in words for ch in w):
+        return None
+    phrase = " ".join(w for w in words if w.isalpha())
+    return phrase or None
+
+@functools.lru_cache(maxsize=None)
+def command_grammar():
+    # Vosk grammars may only contain in-vocabulary words
+    phrases = []
+    for cmd in load_commands():
+        phrase = grammar_phrase(cmd)
+        if phrase and phrase not in phrases:
+            phrases.append(phrase)
+    return tuple(phrases + ["[unk]"])
+
+def has_speech(pcm):
+    import numpy as np
+    audio = np.frombuffer(pcm, np.int16).astype(np.float32) / 32768.0
+    usable = len(audio) - len(audio) % ENERGY_FRAME
+    if usable == 0:
+        return False
+    rms = np.sqrt(np.mean(audio[:usable].reshape(-1, ENERGY_FRAME) ** 2, axis=1))
+    return float(np.mean(rms > MIN_RMS)) >= MIN_SPEECH_FRACTION
+
+@timed
+def vosk_tier(pcm, grammar):
+    with get_recognizer_pool().recognizer(grammar) as recognizer:
+        recognizer.AcceptWaveform(pcm)
+        result = json.loads(recognizer.FinalResult())
+    words = result.get("result", [])
+    confidence = sum(w.get("conf", 0.0) for w in words) / len(words) if words else 0.0
+    return result.get("text", ""), confidence
+
+def whisper_tier(frames, model_name):
+    result = transcribe_whisper_result(frames, model_name)
+    segments = result.get("segments") or []
+    if not segments:
+        return "", -10.0, 1.0
+    avg_logprob = sum(s["avg_logprob"] for s in segments) / len(segments)
+    no_speech = sum(s["no_speech_prob"] for s in segments) / len(segments)
+    return result.get("text", "").strip(), avg_logprob, no_speech
+
+def match_for(mode, text):
+    if mode == "confirm":
+        decision = parse_confirmation(text)
+        return decision, 1.0 if decision else 0.0
+    return match_command_scored(text)
+
+# === Cascade ===
+@timed
+def recognize(frames, mode="command"):
+    """Recognize one utterance. Returns {"transcript", "match", "score", "tier"}.
+
+    "match" is the command (mode="command") or "confirm"/"cancel" (mode="confirm").
+    """
+    pcm = b"".join(frames)
+    with stats.lock:
+        stats.requests += 1
+    if not has_speech(pcm):
+        with stats.lock:
+            stats.silence += 1
+        return {"transcript": "", "match": None, "score": 0.0, "tier": "silence"}
+
+    started = time.perf_counter()
+    grammar = CONFIRM_GRAMMAR if mode == "confirm" else command_grammar()
+    text, confidence = vosk_tier(pcm, grammar)
+    match, score = match_for(mode, text)
+    accepted = confidence >= VOSK_MIN_CONFIDENCE and score >= MATCH_ACCEPT
+    stats.record("vosk", accepted, time.perf_counter() - started)
+    if accepted:
+        return {"transcript": text, "match": match, "score": score, "tier": "vosk"}
+
+    if FAST_WHISPER_MODEL != WHISPER_MODEL_NAME:
+        started = time.perf_counter()
+        text, avg_logprob, no_speech = whisper_tier(frames, FAST_WHISPER_MODEL)
+        if no_speech >= NO_SPEECH_REJECT and avg_logprob < -1.0:
+            stats.record(FAST_WHISPER_MODEL, True, time.perf_counter() - started)
+            with stats.lock:
+                stats.silence += 1
+            return {"transcript": "", "match": None, "score": 0.0, "tier": "silence"}
+        match, score = match_for(mode, text)
+        accepted = avg_logprob >= WHISPER_MIN_LOGPROB and score >= MATCH_ACCEPT
+        stats.record(FAST_WHISPER_MODEL, accepted, time.perf_counter() - started)
+        if accepted:
+            return {"transcript": text, "match": match, "score": score, "tier": FAST_WHISPER_MODEL}
+
+    started = time.perf_counter()
+    text, _, _ = whisper_tier(frames, WHISPER_MODEL_NAME)
+    match, score = match_for(mode, text)
+    stats.record(WHISPER_MODEL_NAME, match is not None, time.perf_counter() - started)
+    return {"transcript": text, "match": match, "score": score, "tier": WHISPER_MODEL_NAME}
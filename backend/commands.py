@@ -0,0 +1,41 @@
+import os
+import json
+import string
+import difflib
+import functools
+
+from backend.profiling import timed
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMMANDS_FILE = os.path.join(base_dir, "utils", "commands.json")
+
+# Trigger words
+TRIGGER_WORDS = ["system"]
+
+@functools.lru_cache(maxsize=None)
+def load_commands():
+    with open(COMMANDS_FILE) as f:
+        return json.load(f)
+
+def match_command(text):
+    return match_command_scored(text)[0]
+
+@timed
+def match_command_scored(text):
+    """(command, score): 1.0 for an exact phrase match, else the fuzzy similarity ratio."""
+    commands = load_commands()
+    for cmd in commands:
+        if cmd.lower() in text.lower():
+            return cmd, 1.0
+    # fallback to fuzzy match
+    lowered = {cmd.lower(): cmd for cmd in commands}
+    matches = difflib.get_close_matches(text.lower(), list(lowered), n=1, cutoff=0.4)
+    if not matches:
+        return None, 0.0
+    return lowered[matches[0]], difflib.SequenceMatcher(None, text.lower(), matches[0]).ratio()
+
+def parse_confirmation(transcript):
+    words = transcript.lower().strip().split()
+    if words and words[-1].strip(string.punctuation) in ("confirm", "cancel"):
+        return words[-1].strip(string.punctuation)
+    return None
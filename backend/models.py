@@ -0,0 +1,83 @@
+# Model layer. whisper/torch, vosk and numpy are imported on first use so the
+# API server can start (and accept connections) before any model is loaded.
+
+import os
+import json
+import threading
+
+from backend.commands import TRIGGER_WORDS
+from backend.profiling import profiler, timed
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# === Config ===
+WHISPER_MODEL_NAME = os.environ.get("WHISPER_MODEL", "medium")
+VOSK_MODEL_PATH = os.path.join(base_dir, "models", "vosk")
+SAMPLE_RATE = 16000
+RECOGNIZER_POOL_SIZE = 4
+
+_lock = threading.Lock()
+_whisper_models = {}   # (name, lane) -> model
+_decode_locks = {}
+_vosk_model = None
+_recognizer_pool = None
+
+# === Loaders ===
+def get_whisper_model(name=WHISPER_MODEL_NAME, lane="live"):
+    """The batch scheduler lane gets its own instance (loaded on its first job), so a
+    long batch decode never holds the lock a live confirmation is waiting on."""
+    key = (name, lane)
+    with _lock:
+        if key not in _whisper_models:
+            import whisper
+            print(f"🔁 Loading Whisper '{name}' ({lane})...")
+            _whisper_models[key] = whisper.load_model(name)
+            _decode_locks[key] = threading.Lock()
+        return _whisper_models[key]
+
+def decode_lock(name, lane="live"):
+    """One decode at a time per model instance: transcribe() installs kv-cache hooks
+    on the instance's modules, so concurrent calls on one instance must not overlap."""
+    get_whisper_model(name, lane)
+    return _decode_locks[(name, lane)]
+
+def get_vosk_model():
+    global _vosk_model
+    with _lock:
+        if _vosk_model is None:
+            from vosk import Model as VoskModel
+            print("🔁 Loading Vosk model...")
+            _vosk_model = VoskModel(VOSK_MODEL_PATH)
+        return _vosk_model
+
+def get_recognizer_pool():
+    """One recognizer per /ws session, checked out of a pool sharing the Vosk model."""
+    global _recognizer_pool
+    model = get_vosk_model()
+    with _lock:
+        if _recognizer_pool is None:
+            from utils.recognizer_pool import RecognizerPool
+            _recognizer_pool = RecognizerPool(model, SAMPLE_RATE, size=RECOGNIZER_POOL_SIZE, words=True)
+        return _recognizer_pool
+
+# === Inference ===
+@timed
+def detect_trigger(audio_data, recognizer):
+    if recognizer.AcceptWaveform(audio_data):
+        result = json.loads(recognizer.Result())
+        text = result.get("text", "").lower()
+        print(f"[VOSK DETECTED]: {text}")
+        return any(w in text for w in TRIGGER_WORDS), text
+    return False, ""
+
+def transcribe_whisper(frames, model_name=WHISPER_MODEL_NAME, lane="live"):
+    return transcribe_whisper_result(frames, model_name, lane).get("text", "").strip()
+
+@timed
+def transcribe_whisper_result(frames, model_name=WHISPER_MODEL_NAME, lane="live"):
+    """Full Whisper result (text, segments with avg_logprob / no_speech_prob)."""
+    import numpy as np
+    from utils.transcript_cache import get_cache
+    audio = np.frombuffer(b''.join(frames), np.int16).astype(np.float32) / 32768.0
+    with decode_lock(model_name, lane), profiler.torch_trace("transcribe_whisper"):
+        return get_cache().transcribe(get_whisper_model(model_name, lane), model_name, audio, language="en")
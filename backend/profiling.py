@@ -0,0 +1,166 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import zipfile
+import tempfile
+import threading
+import functools
+from collections import Counter
+from contextlib import contextmanager
+
+# === Config ===
+SAMPLE_INTERVAL = 0.005      # seconds between stack samples
+MAX_PROFILE_SECONDS = 120
+TOP_FUNCTIONS = 40
+# The functions the live path actually calls (backend/cascade.py), all wrapped with @timed
+FOCUS_FUNCTIONS = ("recognize", "detect_trigger", "vosk_tier", "transcribe_whisper_result", "match_command_scored")
+
+class ProfilerBusy(Exception):
+    pass
+
+class LiveProfiler:
+    """On-demand profiler for the live inference path.
+
+    While a capture runs, a sampler thread records Python stacks of every
+    thread (event loop, capture callback, inference workers), functions
+    wrapped with @timed record call counts and wall time, and each Whisper
+    call is traced with torch.profiler. When no capture is running the only
+    cost is one attribute check per wrapped call.
+    """
+
+    def __init__(self):
+        self.active = False
+        self.lock = threading.Lock()
+        self.workdir = None
+        self.stacks = Counter()
+        self.timings = {}
+        self.trace_count = 0
+
+    # === Hooks used by the hot path ===
+    def record_timing(self, name, seconds):
+        with self.lock:
+            calls, total = self.timings.get(name, (0, 0.0))
+            self.timings[name] = (calls + 1, total + seconds)
+
+    @contextmanager
+    def torch_trace(self, name):
+        if not self.active:
+            yield
+            return
+        import torch
+        from torch.profiler import profile, ProfilerActivity, record_function
+        activities = [ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            activities.append(ProfilerActivity.CUDA)
+        with profile(activities=activities) as prof:
+            with record_function(name):
+                yield
+        with self.lock:
+            self.trace_count += 1
+            index = self.trace_count
+        if self.workdir is not None:
+            prof.export_chrome_trace(os.path.join(self.workdir, f"{name}_trace_{index}.json"))
+
+    # === Stack sampler ===
+    def _sample(self, stop):
+        own = threading.get_ident()
+        while not stop.is_set():
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+            stop.wait(SAMPLE_INTERVAL)
+
+    def _hotspots(self):
+        inclusive = Counter()
+        exclusive = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]
+            if not frames:
+                continue
+            exclusive[frames[-1]] += count
+            for frame in set(frames):
+                inclusive[frame] += count
+        total = sum(self.stacks.values()) or 1
+
+        def row(name, count):
+            return {"function": name, "samples": count, "percent": round(100.0 * count / total, 2)}
+
+        focus = {}
+        for fn in FOCUS_FUNCTIONS:
+            samples = sum(c for name, c in inclusive.items() if name.endswith(f":{fn}"))
+            calls, seconds = self.timings.get(fn, (0, 0.0))
+            focus[fn] = {
+                "samples": samples,
+                "percent": round(100.0 * samples / total, 2),
+                "calls": calls,
+                "total_seconds": round(seconds, 4),
+                "mean_seconds": round(seconds / calls, 4) if calls else None,
+            }
+        return {
+            "sample_interval": SAMPLE_INTERVAL,
+            "total_samples": total,
+            "focus": focus,
+            "inclusive": [row(n, c) for n, c in inclusive.most_common(TOP_FUNCTIONS)],
+            "exclusive": [row(n, c) for n, c in exclusive.most_common(TOP_FUNCTIONS)],
+        }
+
+    # === Capture ===
+    async def capture(self, seconds):
+        """Profile everything for `seconds` and return the path of a zip with traces and hot spots."""
+        if self.active:
+            raise ProfilerBusy("A profile capture is already running")
+        seconds = max(0.1, min(float(seconds), MAX_PROFILE_SECONDS))
+        self.workdir = tempfile.mkdtemp(prefix="voice-profile-")
+        self.stacks = Counter()
+        self.timings = {}
+        self.trace_count = 0
+        stop = threading.Event()
+        sampler = threading.Thread(target=self._sample, args=(stop,), name="profile-sampler", daemon=True)
+        started = time.time()
+        self.active = True
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self.active = False
+            stop.set()
+            sampler.join()
+
+        workdir = self.workdir
+        with open(os.path.join(workdir, "stacks.folded"), "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(os.path.join(workdir, "hotspots.json"), "w", encoding="utf-8") as f:
+            json.dump({"started": started, "seconds": seconds, **self._hotspots()}, f, indent=2)
+
+        archive = os.path.join(workdir, f"profile_{int(started)}.zip")
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+            for name in sorted(os.listdir(workdir)):
+                if not name.endswith(".zip"):
+                    zf.write(os.path.join(workdir, name), name)
+        return archive
+
+profiler = LiveProfiler()
+
+def timed(fn):
+    """Record wall time of fn while a capture is running."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not profiler.active:
+            return fn(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.record_timing(fn.__name__, time.perf_counter() - started)
+    return wrapper
@@ -0,0 +1,122 @@
+# Event protocol for /ws.
+#
+# Every server message is an event {"seq", "type", "ts", "text"?, ...} with a
+# per-session monotonic seq. Events are sent one per frame, or as
+# {"type": "batch", "events": [...]} when high-rate events are coalesced.
+# Frames are JSON text, or msgpack binary when the client connects with
+# ?format=msgpack. Clients ack with {"type": "ack", "seq": N}; unacked events
+# stay in a replay buffer so a client reconnecting with
+# ?session=<id>&last_seq=<N> receives everything it missed.
+#
+# Coalescing follows the session's clock, not a timer: queued high-rate events
+# go out on the first tick() (called from the session's read loop) or emit after
+# BATCH_INTERVAL, or with the next normal event / explicit flush(). Replays on a
+# VirtualClock therefore produce the same frames regardless of compute speed.
+
+import json
+from collections import deque
+
+# === Config ===
+REPLAY_BUFFER_SIZE = 512
+BATCH_INTERVAL = 0.05          # seconds high-rate events wait to be coalesced
+HIGH_RATE_EVENTS = {"progress"}
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+def negotiate_format(requested):
+    return "msgpack" if requested == "msgpack" and msgpack is not None else "json"
+
+def decode_frame(message):
+    """Decode a client frame (Starlette receive() message) into a dict, or None."""
+    try:
+        if message.get("bytes") is not None and msgpack is not None:
+            return msgpack.unpackb(message["bytes"])
+        if message.get("text") is not None:
+            return json.loads(message["text"])
+    except (ValueError, TypeError) as e:
+        print(f"⚠️ Bad client frame: {e}")
+    return None
+
+class EventChannel:
+    """Sequenced, buffered event stream for one session; survives websocket reconnects."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.seq = 0
+        self.buffer = deque(maxlen=REPLAY_BUFFER_SIZE)
+        self.pending = []
+        self.websocket = None
+        self.format = "json"
+        self.batch_started = None  # clock time the oldest queued high-rate event was emitted
+
+    # === Connection ===
+    async def attach(self, websocket, fmt="json", last_seq=None, snapshot=None):
+        """Bind a (new) websocket, replay buffered events after last_seq, then send a session snapshot."""
+        self.websocket = websocket
+        self.format = fmt
+        oldest = self.buffer[0]["seq"] if self.buffer else self.seq + 1
+        gap = last_seq is not None and last_seq + 1 < oldest
+        self.pending = [e for e in self.buffer if last_seq is not None and e["seq"] > last_seq]
+        await self.emit("session", gap=gap, format=fmt, **(snapshot or {}))
+
+    def detach(self, websocket):
+        if self.websocket is websocket:
+            self.websocket = None
+
+    def ack(self, seq):
+        while self.buffer and self.buffer[0]["seq"] <= seq:
+            self.buffer.popleft()
+
+    # === Sending ===
+    async def emit(self, type, text=None, **data):
+        self.seq += 1
+        event = {"seq": self.seq, "type": type, "ts": round(self.clock.time(), 3)}
+        if text is not None:
+            event["text"] = text
+        event.update(data)
+        self.buffer.append(event)
+        if type in HIGH_RATE_EVENTS:
+            self._coalesce(event)
+            if self.batch_started is None:
+                self.batch_started = self.clock.time()
+            await self.tick()
+        else:
+            self.pending.append(event)
+            await self.flush()
+        return event
+
+    async def tick(self):
+        """Send queued high-rate events once BATCH_INTERVAL of clock time has passed."""
+        if self.batch_started is not None and self.clock.time() - self.batch_started >= BATCH_INTERVAL:
+            await self.flush()
+
+    def _coalesce(self, event):
+        # Progress counters are cumulative: a newer one for the same stage replaces the queued one
+        for i, queued in enumerate(self.pending):
+            if queued["type"] == event["type"] and queued.get("stage") == event.get("stage"):
+                self.pending[i] = event
+                return
+        self.pending.append(event)
+
+    async def flush(self):
+        self.batch_started = None
+        if self.websocket is None:
+            self.pending = []  # still in the replay buffer
+            return
+        if not self.pending:
+            return
+        events, self.pending = self.pending, []
+        frame = events[0] if len(events) == 1 else {"type": "batch", "events": events}
+        websocket = self.websocket
+        try:
+            if self.format == "msgpack":
+                await websocket.send_bytes(msgpack.packb(frame))
+            else:
+                await websocket.send_text(json.dumps(frame))
+        except Exception as e:
+            # Client went away; events stay in the replay buffer for a resume
+            print(f"⚠️ Send failed, session detached: {e}")
+            self.detach(websocket)
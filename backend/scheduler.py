@@ -0,0 +1,152 @@
+import os
+import time
+import asyncio
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+# === Priorities (lower runs first) ===
+PRIORITY_CONFIRM = 0   # in-progress confirmations
+PRIORITY_COMMAND = 1   # fresh commands after a trigger
+PRIORITY_BATCH = 2     # offline / bulk transcription
+
+# === Limits ===
+MAX_SESSIONS = int(os.environ.get("MAX_SESSIONS", 8))
+MAX_QUEUE_DEPTH = int(os.environ.get("MAX_QUEUE_DEPTH", 8))
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", 1))  # concurrent live model calls
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", 1))          # batch runs in its own lane
+
+# Queued jobs allowed per priority: confirmations get extra headroom, batch gets less
+QUEUE_DEPTH = {
+    PRIORITY_CONFIRM: MAX_QUEUE_DEPTH * 2,
+    PRIORITY_COMMAND: MAX_QUEUE_DEPTH,
+    PRIORITY_BATCH: max(1, MAX_QUEUE_DEPTH // 2),
+}
+
+class SchedulerBusy(Exception):
+    pass
+
+def lane_of(priority):
+    return "batch" if priority >= PRIORITY_BATCH else "live"
+
+class InferenceScheduler:
+    """Admission control for /ws sessions plus a priority queue in front of model inference.
+
+    Jobs run on small thread pools so Whisper never blocks the event loop.
+    Batch jobs get their own lane (queue, workers, threads and, in
+    backend/models.py, Whisper instance), so a long batch transcription never
+    holds the worker or the model that live commands need.
+    A live job whose deadline cannot be met given the work queued ahead of it
+    is rejected up front with SchedulerBusy instead of slowing every session
+    down; a job that would start right away is always admitted.
+    """
+
+    def __init__(self, max_sessions=MAX_SESSIONS, queue_depth=QUEUE_DEPTH, workers=INFERENCE_WORKERS,
+                 batch_workers=BATCH_WORKERS):
+        self.max_sessions = max_sessions
+        self.queue_depth = dict(queue_depth)
+        self.workers = {"live": workers, "batch": batch_workers}
+        self.executors = {lane: ThreadPoolExecutor(max_workers=n, thread_name_prefix=f"inference-{lane}")
+                          for lane, n in self.workers.items()}
+        self.executor = self.executors["live"]
+        self.active_sessions = 0
+        self.pending = {p: 0 for p in self.queue_depth}
+        self.running = {p: 0 for p in self.queue_depth}
+        # EWMA of job seconds per priority (a batch file and a confirmation differ by orders of magnitude)
+        self.service_time = {p: 1.0 for p in self.queue_depth}
+        self.rejected = 0
+        self.counter = itertools.count()
+        self.loop = None
+        self.queues = {}
+
+    # === Sessions ===
+    def admit_session(self):
+        if self.active_sessions >= self.max_sessions:
+            self.rejected += 1
+            return False
+        self.active_sessions += 1
+        return True
+
+    def end_session(self):
+        self.active_sessions -= 1
+
+    # === Jobs ===
+    def _start(self):
+        # Queues and workers belong to one event loop; rebuild them when a new
+        # loop (another asyncio.run, e.g. per replayed session) uses the scheduler
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.loop = loop
+            self.queues = {lane: asyncio.PriorityQueue() for lane in self.workers}
+            self.pending = {p: 0 for p in self.queue_depth}
+            self.running = {p: 0 for p in self.queue_depth}
+            for lane, n in self.workers.items():
+                for _ in range(n):
+                    loop.create_task(self._worker(lane))
+
+    def jobs_ahead(self, priority):
+        lane = lane_of(priority)
+        return sum(self.running[p] + (self.pending[p] if p <= priority else 0)
+                   for p in self.queue_depth if lane_of(p) == lane)
+
+    def estimated_wait(self, priority):
+        lane = lane_of(priority)
+        ahead = sum((self.running[p] + (self.pending[p] if p <= priority else 0)) * self.service_time[p]
+                    for p in self.queue_depth if lane_of(p) == lane)
+        return ahead / self.workers[lane]
+
+    async def run(self, fn, *args, priority=PRIORITY_COMMAND, deadline=None):
+        """Run fn(*args) on the inference pool; deadline is seconds from now."""
+        self._start()
+        if self.pending[priority] >= self.queue_depth[priority]:
+            self.rejected += 1
+            raise SchedulerBusy("Inference queue full")
+        # A free worker means the job starts now: nothing to wait for, so never reject
+        if (deadline is not None and self.jobs_ahead(priority) >= self.workers[lane_of(priority)]
+                and self.estimated_wait(priority) + self.service_time[priority] > deadline):
+            self.rejected += 1
+            raise SchedulerBusy("Deadline cannot be met")
+
+        future = asyncio.get_running_loop().create_future()
+        expires = time.monotonic() + deadline if deadline is not None else None
+        self.pending[priority] += 1
+        await self.queues[lane_of(priority)].put((priority, next(self.counter), fn, args, future, expires))
+        return await future
+
+    async def _worker(self, lane):
+        loop = asyncio.get_running_loop()
+        queue = self.queues[lane]
+        while True:
+            priority, _, fn, args, future, expires = await queue.get()
+            self.pending[priority] -= 1
+            if future.cancelled():
+                continue
+            if expires is not None and time.monotonic() > expires:
+                self.rejected += 1
+                future.set_exception(SchedulerBusy("Deadline expired while queued"))
+                continue
+            self.running[priority] += 1
+            started = time.monotonic()
+            try:
+                result = await loop.run_in_executor(self.executors[lane], fn, *args)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            else:
+                if not future.cancelled():
+                    future.set_result(result)
+            finally:
+                self.running[priority] -= 1
+                elapsed = time.monotonic() - started
+                self.service_time[priority] = 0.8 * self.service_time[priority] + 0.2 * elapsed
+
+    def stats(self):
+        return {
+            "active_sessions": self.active_sessions,
+            "max_sessions": self.max_sessions,
+            "pending": {str(p): n for p, n in self.pending.items()},
+            "running": {str(p): n for p, n in self.running.items()},
+            "service_time": {str(p): round(t, 3) for p, t in self.service_time.items()},
+            "rejected": self.rejected,
+        }
+
+scheduler = InferenceScheduler()
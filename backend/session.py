@@ -0,0 +1,304 @@
+# Server layer: the /ws command state machine. Models and the microphone are
+# reached through backend.models / backend.capture, which load lazily.
+#
+# A session outlives its websocket: audio comes from the server-side source, so
+# the state machine keeps running through a network blip and a client that
+# reconnects with ?session=<id>&last_seq=<N> picks up the same command flow
+# (see backend/protocol.py). A clean close (1000/1001) ends the session at once;
+# while detached the session is paused: microphone stopped, nothing confirmed.
+
+import json
+import time
+import uuid
+import asyncio
+import functools
+
+from utils.replay import SystemClock, QueueAudioSource
+from utils.flight_recorder import get_recorder
+from backend.capture import audio_queue, start_microphone_stream
+from backend.models import detect_trigger, get_recognizer_pool
+from backend.cascade import recognize
+from backend.protocol import EventChannel, negotiate_format, decode_frame
+from backend.scheduler import scheduler, SchedulerBusy, PRIORITY_COMMAND, PRIORITY_CONFIRM
+from backend.warmup import readiness
+
+# Seconds a decode may wait in the inference scheduler before the client is told "busy"
+COMMAND_DEADLINE = 10
+CONFIRM_DEADLINE = 5
+
+# Seconds a session with no connected client is kept for a resume
+SESSION_TTL = 60
+CLEAN_CLOSE_CODES = (1000, 1001)  # normal closure, going away: the client is not coming back
+PROGRESS_EVERY = 16  # chunks (~1 s) between progress events
+
+sessions = {}
+
+class CommandSession:
+    def __init__(self, clock):
+        self.id = uuid.uuid4().hex
+        self.clock = clock
+        self.channel = EventChannel(clock)
+        self.state = "listening"
+        self.pending_command = None
+        self.task = None
+        self.expiry = None
+
+    def snapshot(self):
+        return {"session": self.id, "state": self.state, "pending_command": self.pending_command}
+
+    async def emit(self, type, text=None, **data):
+        return await self.channel.emit(type, text, **data)
+
+    async def attach(self, websocket, fmt, last_seq):
+        if self.expiry is not None:
+            self.expiry.cancel()
+            self.expiry = None
+        await self.channel.attach(websocket, fmt, last_seq, self.snapshot())
+
+    def detach(self, websocket, clean=False):
+        self.channel.detach(websocket)
+        if self.channel.websocket is None and self.task is not None and not self.task.done():
+            if clean:
+                self.close()
+            else:
+                self.expiry = asyncio.get_running_loop().call_later(SESSION_TTL, self.close)
+
+    def close(self):
+        sessions.pop(self.id, None)
+        if self.task is not None:
+            self.task.cancel()
+
+async def run_session(session, source=None):
+    clock = session.clock
+    # Audit trail: enqueue only, the recorder's writer thread does the disk work
+    record = functools.partial(get_recorder().record, session.id)
+    await session.emit("status", "Listening started. Say trigger word.")
+
+    recognizer_pool = None
+    recognizer = None
+    stream = None
+    frames = []
+    triggered = False
+    silence_count = 0
+    confirmation_frames = []
+    triggered_at = None
+    paused = False
+
+    try:
+        # Inside the try: a missing model or microphone is reported to the client and leaks nothing
+        recognizer_pool = get_recognizer_pool()
+        recognizer = recognizer_pool.checkout()
+        if source is None:
+            stream = start_microphone_stream()
+            source = QueueAudioSource(audio_queue)
+        while True:
+            await session.channel.tick()
+            if session.channel.websocket is None:
+                # Client dropped: hold the microphone and any pending command until it
+                # resumes; SESSION_TTL (or the drain timeout) ends the session otherwise
+                if readiness.draining and session.pending_command is None:
+                    break
+                if not paused:
+                    paused = True
+                    triggered = False  # a half-captured command is dropped
+                    frames = []
+                    if session.pending_command is None:
+                        session.state = "listening"
+                    if stream is not None:
+                        stream.stop_stream()
+                await clock.sleep(0.1)
+                continue
+            if paused:
+                paused = False
+                if stream is not None:
+                    stream.start_stream()
+                source.clear()
+            if session.pending_command is None:
+                # Draining: finish an in-flight command, but don't listen for a new one
+                if readiness.draining and not triggered:
+                    await session.emit("draining", "Server restarting. Reconnecting...")
+                    break
+                audio_data = source.read()
+                if audio_data is None:
+                    if source.exhausted:
+                        break
+                    await clock.sleep(0.01)
+                else:
+                    frames.append(audio_data)
+                    is_triggered, trigger_text = detect_trigger(audio_data, recognizer)
+                    if is_triggered and not triggered:
+                        triggered = True
+                        triggered_at = clock.time()
+                        record("trigger", text=trigger_text)
+                        session.state = "capturing_command"
+                        await session.emit("trigger", "Trigger word detected. Please say your command.")
+                        frames = []
+                        silence_count = 0
+                        source.clear()
+                        await clock.sleep(0.5)
+                        continue
+
+                    if triggered:
+                        silence_count += 1
+                        if silence_count % PROGRESS_EVERY == 0:
+                            await session.emit("progress", stage="command", frames=len(frames))
+                        if silence_count > 100:
+                            triggered = False
+                            session.state = "listening"
+                            capture_seconds = clock.time() - triggered_at
+                            await session.channel.flush()  # final progress before a slow decode
+                            started = time.perf_counter()
+                            try:
+                                result = await scheduler.run(recognize, frames, "command",
+                                                             priority=PRIORITY_COMMAND, deadline=COMMAND_DEADLINE)
+                            except SchedulerBusy:
+                                record("outcome", audio=b"".join(frames), outcome="busy", stage="command")
+                                await session.emit("busy", "Server busy. Say trigger word again.")
+                                frames = []
+                                continue
+                            transcript = result["transcript"]
+                            record("command", audio=b"".join(frames), transcript=transcript, tier=result["tier"],
+                                   score=result["score"], command=result["match"],
+                                   timings={"capture": round(capture_seconds, 3),
+                                            "recognize": round(time.perf_counter() - started, 3)})
+                            frames = []
+                            await session.emit("transcript", f"Transcript: {transcript}", transcript=transcript,
+                                               tier=result["tier"])
+                            command = result["match"]
+                            if command:
+                                session.pending_command = command
+                                session.state = "awaiting_confirmation"
+                                await session.emit("command_matched", "Command matched. Are you sure? Say confirm or cancel.",
+                                                   command=command)
+                            else:
+                                record("outcome", outcome="no_command")
+                                await session.emit("no_command", "No command found. Exiting. Say trigger word again.")
+            else:
+                # Robust confirmation loop: up to 2 attempts
+                command = session.pending_command
+                for attempt in range(2):
+                    if attempt > 0:
+                        await session.emit("confirm_retry", "Did not understand. Please say confirm or cancel.")
+                    await clock.sleep(2)  # Increased delay to ensure prompt is finished
+                    source.clear()  # Clear the audio queue after the delay
+                    confirmation_frames = []
+                    start_time = clock.time()
+                    duration = 3.5  # seconds
+                    while clock.time() - start_time < duration:
+                        await session.channel.tick()
+                        audio_data = source.read()
+                        if audio_data is not None:
+                            confirmation_frames.append(audio_data)
+                            if len(confirmation_frames) % PROGRESS_EVERY == 0:
+                                await session.emit("progress", stage="confirm", frames=len(confirmation_frames))
+                        else:
+                            await clock.sleep(0.01)
+                    await session.emit("progress", f"Confirmation frames collected: {len(confirmation_frames)}",
+                                       stage="confirm", frames=len(confirmation_frames))
+                    capture_seconds = clock.time() - start_time
+                    await session.channel.flush()
+                    started = time.perf_counter()
+                    try:
+                        result = await scheduler.run(recognize, confirmation_frames, "confirm",
+                                                     priority=PRIORITY_CONFIRM, deadline=CONFIRM_DEADLINE)
+                    except SchedulerBusy:
+                        record("outcome", audio=b"".join(confirmation_frames), outcome="busy", stage="confirm",
+                               command=command)
+                        await session.emit("busy", "Server busy. Command not executed. Say trigger word again.",
+                                           command=command)
+                        break
+                    transcript = result["transcript"]
+                    await session.emit("transcript", f"Transcript: {transcript}", transcript=transcript,
+                                       tier=result["tier"])
+                    decision = result["match"]
+                    record("confirmation", audio=b"".join(confirmation_frames), attempt=attempt + 1,
+                           transcript=transcript, tier=result["tier"], decision=decision, command=command,
+                           timings={"capture": round(capture_seconds, 3),
+                                    "recognize": round(time.perf_counter() - started, 3)})
+                    if decision == "confirm" and session.channel.websocket is None:
+                        # Never execute for a client that is no longer there
+                        record("outcome", outcome="detached", command=command)
+                        await session.emit("cancelled", "Client disconnected. Command not executed.", command=command)
+                        break
+                    if decision == "confirm":
+                        record("outcome", outcome="confirmed", command=command)
+                        await session.emit("confirmed", "Command confirmed. Executing command.", command=command)
+                        break
+                    elif decision == "cancel":
+                        record("outcome", outcome="cancelled", command=command)
+                        await session.emit("cancelled", "Command cancelled. Say trigger word again.", command=command)
+                        break
+                else:
+                    record("outcome", outcome="no_response", command=command)
+                    await session.emit("no_response", "No response detected. Exiting. Say trigger word again.",
+                                       command=command)
+                session.pending_command = None
+                session.state = "listening"
+    except Exception as e:
+        record("error", text=str(e))
+        await session.emit("error", f"Error: {str(e)}")
+    finally:
+        await session.channel.flush()
+        if recognizer is not None:
+            recognizer_pool.release(recognizer)
+        if stream is not None:
+            stream.stop_stream()
+            stream.close()
+
+async def drain_sessions(timeout):
+    """Wait for sessions to finish their current command (see readiness.draining), then cancel the rest."""
+    tasks = [s.task for s in sessions.values() if s.task is not None and not s.task.done()]
+    if not tasks:
+        return {"drained": 0, "cancelled": 0}
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    return {"drained": len(done), "cancelled": len(pending)}
+
+async def read_client(websocket, session):
+    """Handle acks until the client disconnects; returns the close code."""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return message.get("code", 1000)
+        frame = decode_frame(message)
+        if isinstance(frame, dict) and frame.get("type") == "ack":
+            session.channel.ack(int(frame.get("seq", 0)))
+
+# clock/source default to wall time and the microphone; utils/replay.py provides
+# a VirtualClock and ReplayAudioSource to drive recorded sessions faster than real time.
+async def main_loop_websocket(websocket, clock=None, source=None):
+    await websocket.accept()
+    params = websocket.query_params
+    fmt = negotiate_format(params.get("format"))
+    session = sessions.get(params.get("session"))
+    last_seq = params.get("last_seq")
+    last_seq = int(last_seq) if last_seq is not None and last_seq.isdigit() else None
+
+    if session is None:
+        # Admission is per session, so a client resuming its session is never turned away
+        if not scheduler.admit_session():
+            await websocket.send_text(json.dumps({"seq": 1, "type": "busy", "text": "Server busy. Try again later."}))
+            await websocket.close(code=1013)  # Try Again Later
+            return
+        session = CommandSession(clock or SystemClock())
+        sessions[session.id] = session
+        await session.attach(websocket, fmt, None)
+        session.task = asyncio.ensure_future(run_session(session, source))
+        session.task.add_done_callback(lambda task: scheduler.end_session())
+        print(f"WebSocket accepted, new session {session.id}")
+    else:
+        await session.attach(websocket, fmt, last_seq)
+        print(f"WebSocket accepted, resumed session {session.id} after seq {last_seq}")
+
+    reader = asyncio.ensure_future(read_client(websocket, session))
+    clean = False
+    try:
+        await asyncio.wait({session.task, reader}, return_when=asyncio.FIRST_COMPLETED)
+        clean = (reader.done() and not reader.cancelled() and reader.exception() is None
+                 and reader.result() in CLEAN_CLOSE_CODES)
+    finally:
+        reader.cancel()
+        session.detach(websocket, clean)
+        if session.task.done():
+            sessions.pop(session.id, None)
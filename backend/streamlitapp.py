@@ -3,6 +3,7 @@ from websocket import WebSocketApp
 import threading
 import queue
 import time
+import json
 from streamlit.runtime.scriptrunner import add_script_run_ctx
 from streamlit_autorefresh import st_autorefresh
 
@@ -32,6 +33,7 @@ st.title("Cockpit Voice Command System")
 st.markdown("Press start to activate the assistant.")
 
 WEBSOCKET_URL = "ws://localhost:8000/ws"
+RECONNECT_DELAY = 1  # seconds
 
 # === Streamlit Session State ===
 if "message_queue" not in st.session_state:
@@ -46,12 +48,25 @@ if "ws_connected" not in st.session_state:
     st.session_state.ws_connected = False
 if "listening" not in st.session_state:
     st.session_state.listening = False
+# Server session to resume after a dropped connection (see backend/protocol.py)
+if "ws_session_id" not in st.session_state:
+    st.session_state.ws_session_id = None
+if "last_seq" not in st.session_state:
+    st.session_state.last_seq = None
 
 # WebSocket callbacks
 
 def on_message(ws, message):
     print("[WS Message]", message)
-    st.session_state.message_queue.put(message)
+    frame = json.loads(message)
+    events = frame["events"] if frame.get("type") == "batch" else [frame]
+    for event in events:
+        if event["type"] == "session":
+            st.session_state.ws_session_id = event["session"]
+        if "text" in event:
+            st.session_state.message_queue.put(event["text"])
+    st.session_state.last_seq = events[-1]["seq"]
+    ws.send(json.dumps({"type": "ack", "seq": st.session_state.last_seq}))
 
 def on_open(ws):
     print("[WS Open]")
@@ -68,16 +83,27 @@ def on_close(ws, code, msg):
     st.session_state.message_queue.put("Connection closed")
     st.session_state.ws_connected = False
 
+def websocket_url():
+    if st.session_state.ws_session_id is None:
+        return WEBSOCKET_URL
+    url = f"{WEBSOCKET_URL}?session={st.session_state.ws_session_id}"
+    if st.session_state.last_seq is not None:
+        url += f"&last_seq={st.session_state.last_seq}"
+    return url
+
 def start_ws_client():
     print("[DEBUG] WebSocket client thread started")
-    ws = WebSocketApp(
-        WEBSOCKET_URL,
-        on_message=on_message,
-        on_open=on_open,
-        on_error=on_error,
-        on_close=on_close
-    )
-    ws.run_forever()
+    # Reconnect and resume the same server session after a network blip
+    while st.session_state.listening:
+        ws = WebSocketApp(
+            websocket_url(),
+            on_message=on_message,
+            on_open=on_open,
+            on_error=on_error,
+            on_close=on_close
+        )
+        ws.run_forever()
+        time.sleep(RECONNECT_DELAY)
     print("[DEBUG] WebSocket client thread exiting")
 
 # === Start Listening Button ===
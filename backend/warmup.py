@@ -0,0 +1,92 @@
+# Startup warm-up and readiness. The first Whisper decode after a model load pays
+# for allocations, kernel selection and lazy init; warm_up() pays it at startup
+# with synthetic audio shaped like live traffic, and /ready (backend/app.py)
+# only reports ready once that is done.
+
+import os
+import time
+import threading
+
+from backend.models import get_whisper_model, decode_lock, get_recognizer_pool, WHISPER_MODEL_NAME, SAMPLE_RATE, RECOGNIZER_POOL_SIZE
+from backend.cascade import FAST_WHISPER_MODEL, CONFIRM_GRAMMAR, command_grammar
+
+# === Config ===
+WARMUP_ENABLED = os.environ.get("WARMUP", "1") != "0"
+# Seconds of audio per decode: a command window (101 x 1024-sample chunks) and a confirmation window
+WARMUP_SHAPES = {"command": 101 * 1024 / SAMPLE_RATE, "confirm": 3.5}
+WARMUP_RUNS = int(os.environ.get("WARMUP_RUNS", "1"))
+
+class Readiness:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ready = False
+        self.draining = False
+        self.error = None
+        self.started = None
+        self.finished = None
+        self.steps = []
+
+    def step(self, name, seconds):
+        with self.lock:
+            self.steps.append({"step": name, "ms": round(seconds * 1000, 1)})
+
+    def report(self):
+        with self.lock:
+            return {
+                "ready": self.ready and not self.draining,
+                "draining": self.draining,
+                "error": self.error,
+                "warmup_seconds": round(self.finished - self.started, 2) if self.finished else None,
+                "steps": list(self.steps),
+            }
+
+readiness = Readiness()
+
+def synthetic_audio(seconds):
+    # Low-level noise rather than zeros, so decoding runs past the first token
+    import numpy as np
+    rng = np.random.default_rng(0)
+    return (0.01 * rng.standard_normal(int(seconds * SAMPLE_RATE))).astype(np.float32)
+
+def warm_vosk():
+    started = time.perf_counter()
+    pool = get_recognizer_pool()
+    readiness.step("load vosk", time.perf_counter() - started)
+    pcm = (synthetic_audio(WARMUP_SHAPES["confirm"]) * 32767).astype("int16").tobytes()
+    for name, grammar in (("command", command_grammar()), ("confirm", CONFIRM_GRAMMAR)):
+        started = time.perf_counter()
+        # Grammar recognizers compile their FST on construction; build the pool's share now
+        pool.prewarm(RECOGNIZER_POOL_SIZE, grammar)
+        with pool.recognizer(grammar) as recognizer:
+            recognizer.AcceptWaveform(pcm)
+            recognizer.FinalResult()
+        readiness.step(f"vosk {name} grammar", time.perf_counter() - started)
+
+def warm_whisper(name):
+    started = time.perf_counter()
+    model = get_whisper_model(name)
+    readiness.step(f"load whisper {name}", time.perf_counter() - started)
+    for shape, seconds in WARMUP_SHAPES.items():
+        audio = synthetic_audio(seconds)
+        for run in range(WARMUP_RUNS):
+            started = time.perf_counter()
+            # Straight to the model: the transcript cache would answer repeat runs
+            with decode_lock(name):
+                model.transcribe(audio, language="en", fp16=model.device.type == "cuda")
+            readiness.step(f"whisper {name} {shape} #{run + 1}", time.perf_counter() - started)
+
+def warm_up():
+    """Load and exercise every model the cascade uses, then mark the server ready."""
+    readiness.started = time.time()
+    try:
+        if WARMUP_ENABLED:
+            print("🔥 Warming up models...")
+            warm_vosk()
+            for name in dict.fromkeys((FAST_WHISPER_MODEL, WHISPER_MODEL_NAME)):
+                warm_whisper(name)
+        readiness.finished = time.time()
+        readiness.ready = True
+        print(f"✅ Ready after {readiness.finished - readiness.started:.1f}s warm-up")
+    except Exception as e:
+        readiness.error = str(e)
+        print(f"❌ Warm-up failed: {e}")
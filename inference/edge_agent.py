@@ -0,0 +1,257 @@
+# edge_agent.py
+#
+# Lightweight capture endpoint: microphone + VAD + Vosk wake word only.
+# Post-trigger utterances are forwarded over HTTP to a pool of transcription
+# servers (backend/app.py, POST /transcribe) which run Whisper and command
+# matching. Run with --loopback to exercise the agent against a local stand-in
+# server without any Whisper model.
+
+import os
+import json
+import time
+import queue
+import socket
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pyaudio
+import requests
+import webrtcvad
+from vosk import Model, KaldiRecognizer
+
+# === Config ===
+base_dir = os.path.dirname(os.path.dirname(__file__))  # parent of /inference
+TRIGGER_WORDS = ["system"]
+
+RATE = 16000
+CHANNELS = 1
+FORMAT = pyaudio.paInt16
+FRAME_MS = 30                          # webrtcvad accepts 10/20/30 ms frames
+CHUNK = RATE * FRAME_MS // 1000        # 480 samples per frame
+
+VAD_AGGRESSIVENESS = 2
+END_SILENCE_MS = 800                   # trailing silence that ends an utterance
+COMMAND_MAX_SECONDS = 8
+CONFIRM_MAX_SECONDS = 4
+
+DEFAULT_SERVERS = os.environ.get("TRANSCRIBE_SERVERS", "http://127.0.0.1:8000")
+REQUEST_TIMEOUT = 15                   # seconds per request
+RETRIES_PER_SERVER = 2                 # connection errors only; other failures fail over at once
+RETRY_BACKOFF = 0.25                   # seconds, doubled per attempt
+SERVER_COOLDOWN = 10                   # seconds a failed server is skipped
+
+LOOPBACK_PORT = 8765
+EDGE_ID = os.environ.get("EDGE_ID", socket.gethostname())  # attributes records in the server's flight recorder
+
+audio_queue = queue.Queue()
+
+# === Server Pool (retry + failover) ===
+class ServerUnavailable(Exception):
+    pass
+
+class ServerRejected(ServerUnavailable):
+    """4xx or unreadable reply: retrying the same server won't help, try the next one."""
+
+class ServerPool:
+    def __init__(self, urls, retries=RETRIES_PER_SERVER, backoff=RETRY_BACKOFF,
+                 cooldown=SERVER_COOLDOWN, timeout=REQUEST_TIMEOUT):
+        self.urls = [u.strip().rstrip("/") for u in urls if u.strip()]
+        if not self.urls:
+            raise ValueError("At least one transcription server is required")
+        self.retries = retries
+        self.backoff = backoff
+        self.cooldown = cooldown
+        self.timeout = timeout
+        self.down_until = {u: 0.0 for u in self.urls}
+        self.next_index = 0
+        self.http = requests.Session()
+        self.http.headers["X-Edge-Id"] = EDGE_ID
+
+    def _candidates(self):
+        # Round-robin across healthy servers; servers in cooldown are tried last
+        start = self.next_index
+        self.next_index = (start + 1) % len(self.urls)
+        rotated = self.urls[start:] + self.urls[:start]
+        now = time.time()
+        healthy = [u for u in rotated if self.down_until[u] <= now]
+        return healthy + [u for u in rotated if u not in healthy]
+
+    def _post(self, url, pcm, mode):
+        response = self.http.post(
+            f"{url}/transcribe",
+            params={"mode": mode},
+            data=pcm,
+            headers={"Content-Type": "application/octet-stream"},
+            timeout=self.timeout,
+        )
+        if response.status_code >= 500:
+            raise ServerUnavailable(f"{url} returned {response.status_code}")
+        if response.status_code >= 400:
+            raise ServerRejected(f"{url} returned {response.status_code}: {response.text[:200]}")
+        try:
+            return response.json()
+        except ValueError:
+            raise ServerRejected(f"{url} returned a non-JSON reply")
+
+    def transcribe(self, pcm, mode="command"):
+        last_error = None
+        for url in self._candidates():
+            for attempt in range(self.retries):
+                try:
+                    result = self._post(url, pcm, mode)
+                    self.down_until[url] = 0.0
+                    return result
+                except requests.ConnectionError as e:
+                    # Includes ConnectTimeout: the request never reached the server, so retry it
+                    last_error = e
+                    time.sleep(self.backoff * (2 ** attempt))
+                except (requests.Timeout, ServerUnavailable) as e:
+                    # ReadTimeout, 5xx/503 busy, 4xx: the server got the request, and retrying
+                    # it would run the decode again on a node that is slow or overloaded
+                    last_error = e
+                    break
+            self.down_until[url] = time.time() + self.cooldown
+            print(f"⚠️ {url} unavailable, failing over: {last_error}")
+        raise ServerUnavailable(f"All transcription servers failed: {last_error}")
+
+# === Loopback Stand-in Server ===
+# Answers /transcribe like backend/app.py but with a scripted reply, so the
+# agent's capture, forwarding, retry and failover can run on one machine.
+with open(os.path.join(base_dir, "utils", "commands.json")) as f:
+    LOOPBACK_COMMAND = json.load(f)[0]
+
+class LoopbackHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        url = urlparse(self.path)
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if url.path != "/transcribe":
+            self.send_error(404)
+            return
+        mode = parse_qs(url.query).get("mode", ["command"])[0]
+        if mode == "confirm":
+            body = {"transcript": "Confirm.", "decision": "confirm"}
+        else:
+            body = {"transcript": LOOPBACK_COMMAND, "command": LOOPBACK_COMMAND}
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_loopback_server(port=LOOPBACK_PORT):
+    server = ThreadingHTTPServer(("127.0.0.1", port), LoopbackHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"🔁 Loopback transcription server on http://127.0.0.1:{port}")
+    return f"http://127.0.0.1:{port}"
+
+# === Capture ===
+def audio_callback(in_data, frame_count, time_info, status):
+    audio_queue.put(in_data)
+    return (None, pyaudio.paContinue)
+
+def start_microphone_stream():
+    p = pyaudio.PyAudio()
+    stream = p.open(format=FORMAT, channels=CHANNELS, rate=RATE, input=True,
+                    frames_per_buffer=CHUNK, stream_callback=audio_callback)
+    stream.start_stream()
+    return stream
+
+def drain_audio_queue():
+    while not audio_queue.empty():
+        audio_queue.get()
+
+def listen_for_trigger(recognizer):
+    print(f"🎙️ Awaiting trigger word... (say '{TRIGGER_WORDS[0]}')")
+    while True:
+        data = audio_queue.get()
+        if recognizer.AcceptWaveform(data):
+            text = json.loads(recognizer.Result()).get("text", "").lower()
+            if any(w in text for w in TRIGGER_WORDS):
+                recognizer.Reset()
+                return text
+
+def capture_utterance(vad, max_seconds):
+    """Collect frames until END_SILENCE_MS of silence follows speech. Returns b"" if nothing was said."""
+    max_frames = int(max_seconds * 1000 / FRAME_MS)
+    end_frames = END_SILENCE_MS // FRAME_MS
+    frames = []
+    heard_speech = False
+    silent_frames = 0
+    while len(frames) < max_frames:
+        data = audio_queue.get()
+        frames.append(data)
+        if vad.is_speech(data, RATE):
+            heard_speech = True
+            silent_frames = 0
+        else:
+            silent_frames += 1
+        if heard_speech and silent_frames >= end_frames:
+            break
+    return b"".join(frames) if heard_speech else b""
+
+# === Main Control Loop ===
+def main_loop(pool):
+    vosk_model = Model(os.path.join(base_dir, "models", "vosk"))
+    recognizer = KaldiRecognizer(vosk_model, RATE)
+    vad = webrtcvad.Vad(VAD_AGGRESSIVENESS)
+    stream = start_microphone_stream()
+    try:
+        print(f"🛰️ Edge agent LIVE → {', '.join(pool.urls)} (Press Ctrl+C to stop)")
+        while True:
+            listen_for_trigger(recognizer)
+            print("🟢 Trigger word detected! Say your command.")
+            drain_audio_queue()
+            pcm = capture_utterance(vad, COMMAND_MAX_SECONDS)
+            if not pcm:
+                print("🔇 No speech after trigger.")
+                continue
+
+            try:
+                result = pool.transcribe(pcm, mode="command")
+            except ServerUnavailable as e:
+                print(f"❌ {e}")
+                continue
+            print(f"📜 Transcript: {result.get('transcript', '')}")
+            command = result.get("command")
+            if not command:
+                print("🚫 Not a valid cockpit command.")
+                continue
+
+            print(f"🤖 Command matched: {command}. Say confirm or cancel.")
+            drain_audio_queue()
+            pcm = capture_utterance(vad, CONFIRM_MAX_SECONDS)
+            decision = None
+            if pcm:
+                try:
+                    decision = pool.transcribe(pcm, mode="confirm").get("decision")
+                except ServerUnavailable as e:
+                    print(f"❌ {e}")
+            if decision == "confirm":
+                print(f"✅ Command executed: {command}")
+            elif decision == "cancel":
+                print("❌ Command aborted.")
+            else:
+                print("⚠️ No decision made. Ignoring.")
+            print("-" * 40)
+    except KeyboardInterrupt:
+        print("\n🛑 Exiting...")
+    finally:
+        stream.stop_stream()
+        stream.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Edge capture agent for central transcription servers")
+    parser.add_argument("--servers", default=DEFAULT_SERVERS,
+                        help="Comma-separated transcription server URLs (env TRANSCRIBE_SERVERS)")
+    parser.add_argument("--loopback", action="store_true",
+                        help="Start a local stand-in server and use it as the only server")
+    args = parser.parse_args()
+
+    servers = [start_loopback_server()] if args.loopback else args.servers.split(",")
+    main_loop(ServerPool(servers))
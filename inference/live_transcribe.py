@@ -1,13 +1,17 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
 import whisper
 import pyaudio
 import wave
-import os
 import time
 import json
 import difflib
 import queue
 import pyttsx3
 from vosk import Model, KaldiRecognizer
+from utils.transcript_cache import get_cache
 
 # === Load Command Data ===
 base_dir = os.path.dirname(os.path.dirname(__file__))  # parent of /inference
@@ -16,7 +20,8 @@ with open(commands_path, "r") as f:
     COMMANDS = json.load(f)
 
 # === Whisper ASR Model ===
-whisper_model = whisper.load_model("base")  # Use base for speed during testing
+WHISPER_MODEL_NAME = "base"  # Use base for speed during testing
+whisper_model = whisper.load_model(WHISPER_MODEL_NAME)
 
 # === Vosk Trigger Word Detection Setup ===
 vosk_model_path = os.path.join(base_dir, "models", "vosk")
@@ -70,7 +75,7 @@ def confirm_action():
     print("🗣️ Say 'Confirm' or 'Cancel'")
     file = record_temp_audio("confirm.wav", duration=3)
     try:
-        result = whisper_model.transcribe(file)
+        result = get_cache().transcribe(whisper_model, WHISPER_MODEL_NAME, file)
         confirm_text = result.get("text", "").strip().lower()
         print(f"🔊 You said: {confirm_text}")
         if "confirm" in confirm_text:
@@ -104,7 +109,7 @@ def main_loop():
             listen_for_trigger()
             audio_file = record_temp_audio()
             try:
-                result = whisper_model.transcribe(audio_file)
+                result = get_cache().transcribe(whisper_model, WHISPER_MODEL_NAME, audio_file)
                 text = result.get("text", "").strip()
             except Exception as e:
                 print(f"❌ Transcription failed: {e}")
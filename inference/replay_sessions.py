@@ -0,0 +1,74 @@
+# replay_sessions.py
+#
+# Runs recorded cockpit sessions (16 kHz mono int16 WAVs) through the
+# WebSocket state machine in backend/session.py on a virtual
+# clock. Decisions are identical to a live run on the same audio, but a
+# session takes only as long as its Whisper/Vosk compute (or 1/N of real
+# time with --speed N).
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import time
+import asyncio
+import argparse
+
+# Replays would otherwise land in the live flight recorder (utils/flight_recorder.py)
+os.environ.setdefault("FLIGHT_RECORDER", "0")
+
+from backend.session import main_loop_websocket
+from utils.replay import VirtualClock, ReplayAudioSource, RecordingWebSocket
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SESSIONS_DIR = os.path.join(BASE_DIR, "data", "sessions")
+OUTPUT_FILE = os.path.join(BASE_DIR, "data", "output", "replay_results.jsonl")
+
+# Silence appended to each session so a trailing command/confirmation window can close
+TAIL_SILENCE = 12.0
+
+async def replay_session(path, speed=None):
+    clock = VirtualClock(speed=speed)
+    source = ReplayAudioSource.from_wav(path, clock, tail_silence=TAIL_SILENCE)
+    websocket = RecordingWebSocket(clock)
+    await main_loop_websocket(websocket, clock=clock, source=source)
+    return {
+        "session": os.path.basename(path),
+        "audio_seconds": round(clock.time(), 3),
+        "messages": websocket.messages,
+    }
+
+async def replay_all(paths, speed=None):
+    results = []
+    for path in paths:
+        started = time.perf_counter()
+        result = await replay_session(path, speed)
+        result["wall_seconds"] = round(time.perf_counter() - started, 3)
+        print(f"▶️ {result['session']}: {result['audio_seconds']}s of audio in {result['wall_seconds']}s")
+        results.append(result)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded sessions through the command state machine")
+    parser.add_argument("paths", nargs="*", help="WAV files or directories (default: data/sessions)")
+    parser.add_argument("--speed", type=float, default=None,
+                        help="Replay at N x real time (default: as fast as compute allows)")
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    paths = []
+    for p in args.paths or [SESSIONS_DIR]:
+        if os.path.isdir(p):
+            paths.extend(os.path.join(p, f) for f in sorted(os.listdir(p)) if f.endswith(".wav"))
+        else:
+            paths.append(p)
+
+    results = asyncio.run(replay_all(paths, args.speed))
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        for result in results:
+            f.write(json.dumps(result) + "\n")
+    total_audio = sum(r["audio_seconds"] for r in results)
+    total_wall = sum(r["wall_seconds"] for r in results)
+    print(f"✅ {len(results)} sessions, {total_audio:.1f}s audio in {total_wall:.1f}s → {args.output}")
@@ -0,0 +1,22 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.cascade import command_grammar, grammar_phrase, MATCH_ACCEPT
+from backend.commands import load_commands, match_command_scored
+
+def test_every_grammar_phrase_maps_back_to_its_command():
+    phrases = {grammar_phrase(cmd): cmd for cmd in load_commands() if grammar_phrase(cmd)}
+    assert set(phrases) == set(command_grammar()) - {"[unk]"}
+    for phrase, cmd in phrases.items():
+        match, score = match_command_scored(phrase)
+        assert match == cmd, phrase
+        assert score >= MATCH_ACCEPT, phrase
+
+def test_hyphens_are_split():
+    assert grammar_phrase("Start before-takeoff checklist.") == "start before takeoff checklist"
+
+def test_commands_with_numbers_are_left_out():
+    assert grammar_phrase("Tune COM1 to 121.5.") is None
+    assert grammar_phrase("Dim panel lights to 50%.") is None
+    assert "tune to" not in command_grammar()
@@ -0,0 +1,142 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import time
+import asyncio
+import threading
+
+import pytest
+
+from backend.scheduler import (InferenceScheduler, SchedulerBusy,
+                               PRIORITY_CONFIRM, PRIORITY_COMMAND, PRIORITY_BATCH)
+
+def make_scheduler(**kwargs):
+    kwargs.setdefault("max_sessions", 2)
+    return InferenceScheduler(**kwargs)
+
+def blocking_job(release):
+    release.wait(5)
+    return "done"
+
+def test_admit_session_limit():
+    s = make_scheduler()
+    assert s.admit_session() and s.admit_session()
+    assert not s.admit_session()
+    s.end_session()
+    assert s.admit_session()
+    assert s.rejected == 1
+
+def test_idle_scheduler_never_rejects_on_deadline():
+    s = make_scheduler()
+    # A pessimistic estimate (e.g. after one slow job) must not lock out an idle server
+    s.service_time[PRIORITY_CONFIRM] = 60.0
+
+    async def main():
+        return await s.run(lambda: "ok", priority=PRIORITY_CONFIRM, deadline=5)
+
+    assert asyncio.run(main()) == "ok"
+    assert s.service_time[PRIORITY_CONFIRM] < 60.0
+
+def test_slow_batch_does_not_affect_live_estimates():
+    s = make_scheduler()
+
+    async def main():
+        await s.run(time.sleep, 0.3, priority=PRIORITY_BATCH)
+        return await s.run(lambda: "ok", priority=PRIORITY_COMMAND, deadline=10)
+
+    assert asyncio.run(main()) == "ok"
+    assert s.service_time[PRIORITY_COMMAND] < 1.0
+    assert s.service_time[PRIORITY_COMMAND] != s.service_time[PRIORITY_BATCH]
+
+def test_batch_runs_in_its_own_lane():
+    s = make_scheduler()
+    release = threading.Event()
+
+    async def main():
+        batch = asyncio.ensure_future(s.run(blocking_job, release, priority=PRIORITY_BATCH))
+        await asyncio.sleep(0.05)
+        # The live worker is free while batch is still running
+        result = await asyncio.wait_for(s.run(lambda: "live", priority=PRIORITY_CONFIRM, deadline=1), 2)
+        release.set()
+        return result, await batch
+
+    assert asyncio.run(main()) == ("live", "done")
+
+def test_deadline_rejected_when_queue_ahead_is_too_long():
+    s = make_scheduler()
+    s.service_time[PRIORITY_COMMAND] = 4.0
+    release = threading.Event()
+
+    async def main():
+        running = asyncio.ensure_future(s.run(blocking_job, release, priority=PRIORITY_COMMAND))
+        await asyncio.sleep(0.05)
+        s.service_time[PRIORITY_COMMAND] = 4.0
+        with pytest.raises(SchedulerBusy):
+            await s.run(lambda: None, priority=PRIORITY_COMMAND, deadline=5)
+        # No deadline: queued behind the running job instead
+        queued = asyncio.ensure_future(s.run(lambda: "queued", priority=PRIORITY_COMMAND))
+        release.set()
+        return await running, await queued
+
+    assert asyncio.run(main()) == ("done", "queued")
+    assert s.rejected == 1
+
+def test_higher_priority_runs_first():
+    s = make_scheduler()
+    release = threading.Event()
+    order = []
+
+    async def main():
+        first = asyncio.ensure_future(s.run(blocking_job, release, priority=PRIORITY_COMMAND))
+        await asyncio.sleep(0.05)
+        command = asyncio.ensure_future(s.run(order.append, "command", priority=PRIORITY_COMMAND))
+        confirm = asyncio.ensure_future(s.run(order.append, "confirm", priority=PRIORITY_CONFIRM))
+        await asyncio.sleep(0.05)
+        release.set()
+        await asyncio.gather(first, command, confirm)
+
+    asyncio.run(main())
+    assert order == ["confirm", "command"]
+
+def test_queue_depth_limit():
+    s = make_scheduler(queue_depth={PRIORITY_CONFIRM: 1, PRIORITY_COMMAND: 1, PRIORITY_BATCH: 1})
+    release = threading.Event()
+
+    async def main():
+        running = asyncio.ensure_future(s.run(blocking_job, release, priority=PRIORITY_COMMAND))
+        await asyncio.sleep(0.05)
+        queued = asyncio.ensure_future(s.run(lambda: "queued", priority=PRIORITY_COMMAND))
+        await asyncio.sleep(0.05)
+        with pytest.raises(SchedulerBusy):
+            await s.run(lambda: None, priority=PRIORITY_COMMAND)
+        release.set()
+        return await running, await queued
+
+    assert asyncio.run(main()) == ("done", "queued")
+
+def test_expired_job_is_rejected_when_dequeued():
+    s = make_scheduler()
+    release = threading.Event()
+
+    async def main():
+        running = asyncio.ensure_future(s.run(blocking_job, release, priority=PRIORITY_COMMAND))
+        await asyncio.sleep(0.05)
+        s.service_time[PRIORITY_COMMAND] = 0.01
+        late = asyncio.ensure_future(s.run(lambda: "late", priority=PRIORITY_COMMAND, deadline=0.1))
+        await asyncio.sleep(0.3)
+        release.set()
+        await running
+        with pytest.raises(SchedulerBusy):
+            await late
+
+    asyncio.run(main())
+
+def test_scheduler_survives_a_new_event_loop():
+    s = make_scheduler()
+
+    async def main():
+        return await asyncio.wait_for(s.run(lambda: "ok", priority=PRIORITY_COMMAND, deadline=5), 2)
+
+    assert asyncio.run(main()) == "ok"
+    assert asyncio.run(main()) == "ok"
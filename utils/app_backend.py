@@ -1,14 +1,19 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
 import queue
 import threading
 import sounddevice as sd
 import numpy as np
 import whisper
-import os
-import time
 import json
 from vosk import Model as VoskModel, KaldiRecognizer
 import pyttsx3
 import wave
+from utils.transcript_cache import get_cache
+from utils.replay import SystemClock, QueueAudioSource
+from utils.recognizer_pool import RecognizerPool
 
 # ========== Config ==========
 TRIGGER_WORDS = ["system"]
@@ -20,9 +25,13 @@ AUDIO_FILE = "temp.wav"
 VOSK_PATH = "vosk-model-small-en-us-0.15"
 
 # ========== Load Models ==========
-whisper_model = whisper.load_model("base")
+WHISPER_MODEL_NAME = "base"
+whisper_model = whisper.load_model(WHISPER_MODEL_NAME)
 vosk_model = VoskModel(VOSK_PATH)
 rec = KaldiRecognizer(vosk_model, SAMPLE_RATE)
+# Confirmation recognizers are restricted to confirm/cancel and reused across prompts
+CONFIRM_GRAMMAR = CONFIRM_WORDS + ["[unk]"]
+recognizer_pool = RecognizerPool(vosk_model, SAMPLE_RATE, size=1, grammars=(CONFIRM_GRAMMAR,))
 
 # ========== TTS ==========
 speaker = pyttsx3.init()
@@ -71,9 +80,14 @@ def listen_for_keyword(keywords):
                     break
 
 # ========== Confirm / Cancel ==========
-def confirm_action():
+# clock/source are injectable (utils/replay.py) so recorded sessions can be replayed faster than real time
+def confirm_action(clock=None, source=None):
+    clock = clock or SystemClock()
     speak("Please confirm or cancel.")
     print("🎧 Listening for confirmation...")
+    if source is not None:
+        return listen_for_confirmation(source, clock)
+
     q = queue.Queue()
     def callback(indata, frames, time, status):
         if status:
@@ -82,10 +96,18 @@ def confirm_action():
 
     with sd.RawInputStream(samplerate=SAMPLE_RATE, blocksize=8000, dtype='int16',
                            channels=1, callback=callback):
-        rec_conf = KaldiRecognizer(vosk_model, SAMPLE_RATE)
-        start_time = time.time()
-        while time.time() - start_time < 5:  # 5 sec window
-            data = q.get()
+        return listen_for_confirmation(QueueAudioSource(q), clock)
+
+def listen_for_confirmation(source, clock):
+    with recognizer_pool.recognizer(CONFIRM_GRAMMAR) as rec_conf:
+        start_time = clock.time()
+        while clock.time() - start_time < 5:  # 5 sec window
+            data = source.read()
+            if data is None:
+                if source.exhausted:
+                    break
+                clock.sleep_sync(0.01)
+                continue
             if rec_conf.AcceptWaveform(data):
                 result = json.loads(rec_conf.Result())
                 word = result.get("text", "")
@@ -94,7 +116,7 @@ def confirm_action():
                     return True
                 elif "cancel" in word:
                     return False
-        return None
+    return None
 
 # ========== Main Inference Loop ==========
 def main_loop():
@@ -106,7 +128,7 @@ def main_loop():
 
             # Step 2: Record Command
             audio_path = record_temp_audio()
-            result = whisper_model.transcribe(audio_path)
+            result = get_cache().transcribe(whisper_model, WHISPER_MODEL_NAME, audio_path)
             transcript = result["text"].strip()
             print(f"📜 Transcript: {transcript}")
 
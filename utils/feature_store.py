@@ -0,0 +1,166 @@
+import os
+import json
+import hashlib
+
+import numpy as np
+
+from utils.transcript_cache import audio_digest
+
+# Dynamically get the project root directory (1 level above /utils/)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# === Config ===
+FEATURE_DIR = os.environ.get("FEATURE_STORE_DIR", os.path.join(BASE_DIR, "data", "cache", "features"))
+
+# Whisper front-end constants (whisper/audio.py)
+SAMPLE_RATE = 16000
+N_FFT = 400
+HOP_LENGTH = 160
+CHUNK_FRAMES = 3000                        # one 30 s Whisper window
+CHUNK_SAMPLES = CHUNK_FRAMES * HOP_LENGTH
+BATCH_SAMPLES = SAMPLE_RATE * 600          # padded samples per feature-extraction batch
+DECODE_BATCH = 16                          # 30 s windows per whisper.decode call
+FEATURE_VERSION = 2                        # bump when stored features change meaning
+
+# model.transcribe defaults for temperature fallback and silence skipping
+TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+def mel_config(n_mels):
+    return {"n_mels": n_mels, "n_fft": N_FFT, "hop_length": HOP_LENGTH,
+            "sample_rate": SAMPLE_RATE, "chunk_frames": CHUNK_FRAMES, "version": FEATURE_VERSION}
+
+# === Feature extraction ===
+def log_mel_batch(audios, n_mels=80, device="cpu"):
+    """Whisper log-mel features for several clips in one batched STFT.
+
+    Matches whisper.log_mel_spectrogram(audio, n_mels, padding=N_SAMPLES) per
+    clip (the dynamic-range floor is taken per clip, not across the batch) and
+    returns each clip as (n_chunks, n_mels, CHUNK_FRAMES) 30 s windows. Frames
+    past the audio are zero, as pad_or_trim leaves them in model.transcribe.
+    """
+    import torch
+    from whisper.audio import mel_filters
+
+    lengths = [len(a) for a in audios]
+    batch = torch.zeros(len(audios), max(lengths) + CHUNK_SAMPLES, device=device)
+    for i, audio in enumerate(audios):
+        batch[i, :len(audio)] = torch.from_numpy(np.asarray(audio, dtype=np.float32))
+
+    window = torch.hann_window(N_FFT, device=device)
+    stft = torch.stft(batch, N_FFT, HOP_LENGTH, window=window, return_complex=True)
+    magnitudes = stft[..., :-1].abs() ** 2
+    mel = mel_filters(device, n_mels) @ magnitudes
+    log_spec = torch.clamp(mel, min=1e-10).log10()
+
+    features = []
+    for i, length in enumerate(lengths):
+        frames = (length + CHUNK_SAMPLES) // HOP_LENGTH
+        spec = log_spec[i, :, :frames]
+        spec = torch.maximum(spec, spec.max() - 8.0)
+        spec = (spec + 4.0) / 4.0
+        spec[:, length // HOP_LENGTH:] = 0.0  # the padding's log-mel is never fed to the encoder
+        n_chunks = max(1, -(-(length // HOP_LENGTH) // CHUNK_FRAMES))
+        spec = torch.nn.functional.pad(spec, (0, max(0, n_chunks * CHUNK_FRAMES - frames)))
+        chunks = spec[:, :n_chunks * CHUNK_FRAMES].reshape(n_mels, n_chunks, CHUNK_FRAMES).permute(1, 0, 2)
+        features.append(chunks.contiguous().cpu().numpy())
+    return features
+
+# === Store ===
+class FeatureStore:
+    """On-disk log-mel features keyed by audio content hash and mel config.
+
+    Each clip is one .npy of shape (n_chunks, n_mels, 3000) opened with
+    mmap_mode="r", so reading a 30 s window touches only that slice.
+    """
+
+    def __init__(self, root=FEATURE_DIR, n_mels=80, device="cpu"):
+        self.root = root
+        self.n_mels = n_mels
+        self.device = device
+        self.config = mel_config(n_mels)
+
+    def _path(self, digest):
+        spec = json.dumps({"audio": digest, **self.config}, sort_keys=True)
+        key = hashlib.sha256(spec.encode()).hexdigest()
+        return os.path.join(self.root, key[:2], key + ".npy")
+
+    def _save(self, path, features):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, features)
+        os.replace(tmp_path, path)
+
+    def _save_batch(self, batch, audios, targets):
+        for p, features in zip(batch, log_mel_batch(audios, self.n_mels, self.device)):
+            self._save(targets[p], features)
+
+    def get(self, audio_path):
+        path = self._path(audio_digest(audio_path))
+        return np.load(path, mmap_mode="r") if os.path.exists(path) else None
+
+    def load(self, audio_paths):
+        """Features for every path, extracting (in batches) only those not stored yet."""
+        import whisper
+
+        targets = {p: self._path(audio_digest(p)) for p in audio_paths}
+        missing = [p for p in audio_paths if not os.path.exists(targets[p])]
+        if missing:
+            print(f"🧮 Extracting log-mel features for {len(missing)} file(s)...")
+            # Decode lazily so at most one batch (plus one file) is in memory; file
+            # size orders by length well enough to keep padding small. The batched
+            # STFT pads every clip to the longest one plus CHUNK_SAMPLES, so the
+            # budget counts that padded rectangle, not just the audio.
+            batch, audios = [], []
+            for p in sorted(missing, key=os.path.getsize):
+                audio = whisper.load_audio(p)
+                padded = (len(audios) + 1) * (max([len(audio)] + [len(a) for a in audios]) + CHUNK_SAMPLES)
+                if batch and padded > BATCH_SAMPLES:
+                    self._save_batch(batch, audios, targets)
+                    batch, audios = [], []
+                batch.append(p)
+                audios.append(audio)
+            self._save_batch(batch, audios, targets)
+        return {p: np.load(targets[p], mmap_mode="r") for p in audio_paths}
+
+# === Transcription from features ===
+def needs_fallback(result):
+    if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+        return False  # silence
+    return result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD
+
+def transcribe_features(model, features_list, batch_size=DECODE_BATCH, **options):
+    """Decode stored features with whisper.decode, batching 30 s windows across files.
+
+    Uses model.transcribe's temperature fallback and silence skipping, but each
+    30 s window is decoded independently: no timestamp-based seeking and no
+    previous-text prompt. Transcripts can therefore differ from
+    model.transcribe, most often on files longer than 30 s.
+    """
+    import torch
+    import whisper
+
+    options.setdefault("fp16", model.device.type == "cuda")
+    windows = [(i, c) for i, features in enumerate(features_list) for c in range(len(features))]
+    texts = [[] for _ in features_list]
+    for start in range(0, len(windows), batch_size):
+        batch = windows[start:start + batch_size]
+        mel = torch.from_numpy(np.stack([features_list[i][c] for i, c in batch])).to(model.device)
+        greedy = {key: v for key, v in options.items() if key != "best_of"}
+        results = whisper.decode(model, mel, whisper.DecodingOptions(**greedy, temperature=TEMPERATURES[0]))
+        for k, result in enumerate(results):
+            # Fallback is rare, so retry those windows one at a time
+            for t in TEMPERATURES[1:]:
+                if not needs_fallback(result):
+                    break
+                retry = {key: v for key, v in options.items() if key not in ("beam_size", "patience")}
+                result = whisper.decode(model, mel[k], whisper.DecodingOptions(**retry, temperature=t))
+            results[k] = result
+        for (i, _), result in zip(batch, results):
+            if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+                continue  # model.transcribe skips silent windows
+            texts[i].append(result.text.strip())
+    return [{"text": " ".join(t for t in parts if t)} for parts in texts]
@@ -0,0 +1,222 @@
+# flight_recorder.py
+#
+# Append-only audit log of what each session heard and did: post-trigger audio,
+# transcripts, matched command, confirmation result and stage timings.
+#
+# record() only enqueues; a background thread batches entries, writes each
+# batch as one gzip member appended to the current segment file
+# (segment-*.jsonl.gz, readable with zcat), rotates segments by size/age and
+# indexes every entry in index.db (sqlite) by time, session and kind.
+#
+#   python utils/flight_recorder.py --session <id> [--since <unix ts>] [--export-wav DIR]
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import gzip
+import json
+import time
+import wave
+import queue
+import base64
+import sqlite3
+import argparse
+import threading
+
+# Dynamically get the project root directory (1 level above /utils/)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# === Config ===
+RECORDER_DIR = os.environ.get("FLIGHT_RECORDER_DIR", os.path.join(BASE_DIR, "data", "flight_recorder"))
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+SEGMENT_MAX_SECONDS = 3600
+FLUSH_INTERVAL = 1.0          # seconds a partial batch may wait
+MAX_BATCH = 256
+QUEUE_SIZE = 10000            # entries buffered before record() starts dropping
+SAMPLE_RATE = 16000
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    ts REAL, session TEXT, kind TEXT, segment TEXT, offset INTEGER, length INTEGER
+);
+CREATE INDEX IF NOT EXISTS entries_session_ts ON entries (session, ts);
+CREATE INDEX IF NOT EXISTS entries_ts ON entries (ts);
+"""
+
+def json_default(value):
+    # numpy scalars/arrays and anything else a caller passes in a payload
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+class FlightRecorder:
+    def __init__(self, root=RECORDER_DIR, enabled=True):
+        self.root = root
+        self.enabled = enabled
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.dropped = 0
+        self.written = 0
+        self.thread = None
+        self.start_lock = threading.Lock()
+        self.segment = None
+        self.segment_started = 0.0
+        self.segments_opened = 0
+
+    # === Hot path ===
+    def record(self, session, kind, audio=None, **payload):
+        """Queue one entry; never blocks. audio is 16 kHz mono int16 PCM bytes."""
+        if not self.enabled:
+            return
+        if self.thread is None:
+            self._start()
+        entry = {"ts": time.time(), "session": session, "kind": kind, **payload}
+        if audio:
+            entry["audio"] = base64.b64encode(audio).decode("ascii")
+            entry["audio_format"] = f"pcm_s16le_{SAMPLE_RATE}"
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        with self.start_lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="flight-recorder", daemon=True)
+                self.thread.start()
+
+    # === Writer thread ===
+    def _run(self):
+        os.makedirs(self.root, exist_ok=True)
+        index = sqlite3.connect(os.path.join(self.root, "index.db"))
+        index.executescript(INDEX_SCHEMA)
+        running = True
+        while running:
+            try:
+                batch = [self.queue.get(timeout=FLUSH_INTERVAL)]
+            except queue.Empty:
+                continue
+            deadline = time.time() + FLUSH_INTERVAL
+            while len(batch) < MAX_BATCH and time.time() < deadline:
+                try:
+                    batch.append(self.queue.get(timeout=max(0.0, deadline - time.time())))
+                except queue.Empty:
+                    break
+            if None in batch:  # close() sentinel
+                batch = [e for e in batch if e is not None]
+                running = False
+            if batch:
+                try:
+                    self._write_batch(index, batch)
+                except Exception as e:
+                    # Lose this batch, never the writer: a dead thread would fill the queue
+                    self.dropped += len(batch)
+                    print(f"❌ Flight recorder write failed, {len(batch)} entries dropped: {e}")
+        index.close()
+
+    def _segment_path(self, size):
+        now = time.time()
+        if (self.segment is None or size >= SEGMENT_MAX_BYTES
+                or now - self.segment_started >= SEGMENT_MAX_SECONDS):
+            stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime(now))
+            self.segment = f"segment-{stamp}-{os.getpid()}-{self.segments_opened:04d}.jsonl.gz"
+            self.segment_started = now
+            self.segments_opened += 1
+        return os.path.join(self.root, self.segment)
+
+    def _write_batch(self, index, batch):
+        data = gzip.compress("".join(json.dumps(e, default=json_default) + "\n" for e in batch).encode("utf-8"))
+        path = os.path.join(self.root, self.segment) if self.segment else None
+        size = os.path.getsize(path) if path and os.path.exists(path) else 0
+        path = self._segment_path(size)
+        with open(path, "ab") as f:
+            offset = f.tell()
+            f.write(data)
+        index.executemany(
+            "INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+            [(e["ts"], e["session"], e["kind"], self.segment, offset, len(data)) for e in batch],
+        )
+        index.commit()
+        self.written += len(batch)
+
+    def close(self, timeout=5.0):
+        """Flush pending entries and stop the writer (call on shutdown)."""
+        if self.thread is not None and self.thread.is_alive():
+            try:
+                self.queue.put(None, timeout=timeout)
+            except queue.Full:
+                print(f"⚠️ Flight recorder queue still full after {timeout}s, closing without flush")
+                return
+            self.thread.join(timeout)
+
+    # === Lookup ===
+    def find(self, session=None, start=None, end=None, kind=None):
+        """Entries matching the filters, oldest first, read back from the segment files."""
+        clauses, params = [], []
+        for column, op, value in (("session", "=", session), ("ts", ">=", start),
+                                  ("ts", "<=", end), ("kind", "=", kind)):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        index_path = os.path.join(self.root, "index.db")
+        if not os.path.exists(index_path):
+            return []
+        index = sqlite3.connect(index_path)
+        try:
+            batches = index.execute(
+                f"SELECT DISTINCT segment, offset, length FROM entries {where} ORDER BY segment, offset", params
+            ).fetchall()
+        finally:
+            index.close()
+
+        entries = []
+        for segment, offset, length in batches:
+            with open(os.path.join(self.root, segment), "rb") as f:
+                f.seek(offset)
+                lines = gzip.decompress(f.read(length)).decode("utf-8").splitlines()
+            for line in lines:
+                entry = json.loads(line)
+                if ((session is None or entry["session"] == session)
+                        and (start is None or entry["ts"] >= start)
+                        and (end is None or entry["ts"] <= end)
+                        and (kind is None or entry["kind"] == kind)):
+                    entries.append(entry)
+        return sorted(entries, key=lambda e: e["ts"])
+
+def decode_audio(entry):
+    return base64.b64decode(entry["audio"]) if "audio" in entry else b""
+
+_default_recorder = None
+
+def get_recorder():
+    """Process-wide recorder; FLIGHT_RECORDER=0 disables it (e.g. for replays)."""
+    global _default_recorder
+    if _default_recorder is None:
+        _default_recorder = FlightRecorder(enabled=os.environ.get("FLIGHT_RECORDER", "1") != "0")
+    return _default_recorder
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the flight recorder")
+    parser.add_argument("--session")
+    parser.add_argument("--kind")
+    parser.add_argument("--since", type=float, help="Unix timestamp")
+    parser.add_argument("--until", type=float, help="Unix timestamp")
+    parser.add_argument("--export-wav", metavar="DIR", help="Write recorded audio as WAVs (replay corpus)")
+    args = parser.parse_args()
+
+    recorder = FlightRecorder(enabled=False)
+    entries = recorder.find(args.session, args.since, args.until, args.kind)
+    if args.export_wav:
+        os.makedirs(args.export_wav, exist_ok=True)
+    for i, entry in enumerate(entries):
+        audio = decode_audio(entry)
+        if args.export_wav and audio:
+            path = os.path.join(args.export_wav, f"{entry['session']}_{i:05d}_{entry['kind']}.wav")
+            with wave.open(path, "wb") as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(SAMPLE_RATE)
+                wf.writeframes(audio)
+        entry.pop("audio", None)
+        print(json.dumps(entry))
@@ -1,5 +1,10 @@
+import sys
 import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import wave
 import ffmpeg
+from utils.resample import SUPPORTED_RATES, AudioNormalizer, to_int16_bytes
 
 # Dynamically get the project root directory (1 level above /utils/)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -8,6 +13,29 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 INPUT_DIR = os.path.join(BASE_DIR, "data", "input")
 OUTPUT_DIR = os.path.join(BASE_DIR, "data", "audio")
 
+# PCM WAVs are resampled/downmixed in-process instead of spawning ffmpeg.
+# Returns False for anything it can't handle so the caller falls back to ffmpeg.
+def convert_wav_inprocess(input_path, output_path, sample_rate=16000, block_frames=65536):
+    try:
+        src = wave.open(input_path, "rb")
+    except (wave.Error, EOFError):
+        return False
+    with src:
+        channels, rate = src.getnchannels(), src.getframerate()
+        if src.getsampwidth() != 2 or channels > 2 or rate not in SUPPORTED_RATES:
+            return False
+        normalizer = AudioNormalizer(rate, channels, "int16", out_rate=sample_rate, normalize_gain=False)
+        with wave.open(output_path, "wb") as dst:
+            dst.setnchannels(1)
+            dst.setsampwidth(2)
+            dst.setframerate(sample_rate)
+            while True:
+                data = src.readframes(block_frames)
+                if not data:
+                    break
+                dst.writeframes(to_int16_bytes(normalizer.process(data)))
+    return True
+
 def convert_all_to_wav(input_dir=INPUT_DIR, output_dir=OUTPUT_DIR, sample_rate=16000):
     os.makedirs(input_dir, exist_ok=True)
     os.makedirs(output_dir, exist_ok=True)
@@ -23,6 +51,10 @@ def convert_all_to_wav(input_dir=INPUT_DIR, output_dir=OUTPUT_DIR, sample_rate=1
             base_name = os.path.splitext(file)[0]
             output_path = os.path.join(output_dir, base_name + "_converted.wav")
 
+            if file.endswith(".wav") and convert_wav_inprocess(input_path, output_path, sample_rate):
+                print(f"[✅] Saved: {output_path}")
+                continue
+
             try:
                 print(f"[🔁] Converting {file} → {output_path}")
                 (
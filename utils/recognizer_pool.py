@@ -0,0 +1,73 @@
+import json
+import threading
+from contextlib import contextmanager
+
+from vosk import KaldiRecognizer
+
+class RecognizerPool:
+    """Pre-warmed KaldiRecognizers bound to one shared Vosk Model.
+
+    Each session checks out its own recognizer (optionally restricted to a
+    grammar, e.g. ["confirm", "cancel", "[unk]"]), and returns it when done.
+    Returned recognizers are Reset() and reused, so construction cost is paid
+    at startup instead of on the hot path.
+    """
+
+    def __init__(self, model, sample_rate=16000, size=2, grammars=(None,), words=False, max_idle=8):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.words = words
+        self.max_idle = max_idle
+        self.lock = threading.Lock()
+        self.idle = {}          # grammar key -> [recognizer, ...]
+        self.checked_out = {}   # id(recognizer) -> grammar key
+        self.created = 0
+        for grammar in grammars:
+            self.prewarm(size, grammar)
+
+    @staticmethod
+    def _key(grammar):
+        return None if grammar is None else json.dumps(list(grammar))
+
+    def _build(self, key):
+        if key is None:
+            recognizer = KaldiRecognizer(self.model, self.sample_rate)
+        else:
+            recognizer = KaldiRecognizer(self.model, self.sample_rate, key)
+        recognizer.SetWords(self.words)
+        self.created += 1
+        return recognizer
+
+    def prewarm(self, count, grammar=None):
+        key = self._key(grammar)
+        built = [self._build(key) for _ in range(count)]
+        with self.lock:
+            self.idle.setdefault(key, []).extend(built)
+
+    def checkout(self, grammar=None):
+        key = self._key(grammar)
+        with self.lock:
+            idle = self.idle.get(key)
+            recognizer = idle.pop() if idle else None
+        if recognizer is None:
+            recognizer = self._build(key)
+        with self.lock:
+            self.checked_out[id(recognizer)] = key
+        return recognizer
+
+    def release(self, recognizer):
+        with self.lock:
+            key = self.checked_out.pop(id(recognizer))
+        recognizer.Reset()
+        with self.lock:
+            idle = self.idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(recognizer)
+
+    @contextmanager
+    def recognizer(self, grammar=None):
+        recognizer = self.checkout(grammar)
+        try:
+            yield recognizer
+        finally:
+            self.release(recognizer)
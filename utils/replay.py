@@ -0,0 +1,121 @@
+import json
+import time
+import wave
+import asyncio
+
+# === Clocks ===
+class SystemClock:
+    """Wall-clock time, used by the live loops."""
+
+    def time(self):
+        return time.time()
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(seconds)
+
+    def sleep_sync(self, seconds):
+        time.sleep(seconds)
+
+class VirtualClock:
+    """Clock that only advances when the pipeline sleeps.
+
+    speed=None runs as fast as compute allows; speed=N waits 1/N of each
+    virtual sleep in real time (speed=1 is real time).
+    """
+
+    def __init__(self, start=0.0, speed=None):
+        self.now = start
+        self.speed = speed
+
+    def time(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+        await asyncio.sleep(seconds / self.speed if self.speed else 0)
+
+    def sleep_sync(self, seconds):
+        self.now += seconds
+        if self.speed:
+            time.sleep(seconds / self.speed)
+
+# === Audio Sources ===
+# read() never blocks: it returns the next chunk of 16 kHz mono int16 PCM, or
+# None when nothing has been captured yet. clear() drops everything pending.
+class QueueAudioSource:
+    """Live source fed by a capture callback (pyaudio / sounddevice)."""
+
+    exhausted = False
+
+    def __init__(self, audio_queue):
+        self.audio_queue = audio_queue
+
+    def read(self):
+        if self.audio_queue.empty():
+            return None
+        return self.audio_queue.get()
+
+    def clear(self):
+        while not self.audio_queue.empty():
+            self.audio_queue.get()
+
+class ReplayAudioSource:
+    """Recorded session released chunk by chunk as the clock reaches each chunk's capture time."""
+
+    def __init__(self, pcm, clock, chunk=1024, rate=16000, tail_silence=0.0):
+        chunk_bytes = chunk * 2
+        pcm += b"\x00\x00" * int(rate * tail_silence)
+        self.chunks = [pcm[i:i + chunk_bytes] for i in range(0, len(pcm), chunk_bytes)]
+        self.clock = clock
+        self.chunk_seconds = chunk / rate
+        self.start = clock.time()
+        self.index = 0
+
+    @classmethod
+    def from_wav(cls, path, clock, chunk=1024, tail_silence=0.0):
+        with wave.open(path, "rb") as wf:
+            if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getframerate() != 16000:
+                raise ValueError(f"{path}: replay expects 16 kHz mono int16 WAV")
+            pcm = wf.readframes(wf.getnframes())
+        return cls(pcm, clock, chunk=chunk, tail_silence=tail_silence)
+
+    @property
+    def exhausted(self):
+        return self.index >= len(self.chunks)
+
+    def _available(self):
+        captured = int((self.clock.time() - self.start) / self.chunk_seconds + 1e-9)
+        return min(captured, len(self.chunks))
+
+    def read(self):
+        if self.index >= self._available():
+            return None
+        data = self.chunks[self.index]
+        self.index += 1
+        return data
+
+    def clear(self):
+        self.index = max(self.index, self._available())
+
+# === Test Doubles ===
+class RecordingWebSocket:
+    """Stands in for a FastAPI WebSocket; keeps every event sent (batches flattened), never disconnects."""
+
+    query_params = {}
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.messages = []
+
+    async def accept(self):
+        pass
+
+    async def receive(self):
+        await asyncio.Event().wait()
+
+    async def send_text(self, text):
+        frame = json.loads(text)
+        self.messages.extend(frame["events"] if frame.get("type") == "batch" else [frame])
+
+    async def close(self, code=1000):
+        pass
@@ -0,0 +1,132 @@
+from math import gcd
+
+import numpy as np
+
+# === Config ===
+TARGET_RATE = 16000
+SUPPORTED_RATES = (8000, 11025, 12000, 16000, 22050, 24000, 32000, 44100, 48000)
+ZERO_CROSSINGS = 8        # filter half-width, in cycles of the lower of the two rates
+KAISER_BETA = 8.0
+ROLLOFF = 0.94            # cutoff as a fraction of the lower Nyquist frequency
+
+# === Resampler ===
+class StreamingResampler:
+    """Polyphase windowed-sinc resampler that keeps filter state across chunks.
+
+    Rates are reduced to up/down factors L/M; each output sample is one dot
+    product of a filter phase with the last K input samples, computed for the
+    whole chunk at once with numpy fancy indexing. Feeding a signal in any
+    chunking gives the same output as feeding it in one piece.
+    """
+
+    def __init__(self, in_rate, out_rate=TARGET_RATE):
+        g = gcd(int(in_rate), int(out_rate))
+        self.up = out_rate // g
+        self.down = in_rate // g
+        self.passthrough = self.up == self.down
+        if self.passthrough:
+            return
+
+        ratio = max(self.up, self.down)
+        self.taps = int(np.ceil(2 * ZERO_CROSSINGS * max(1.0, self.down / self.up)))
+        n = self.taps * self.up
+        cutoff = ROLLOFF * 0.5 / ratio  # cycles per sample at the upsampled rate
+        t = np.arange(n) - (n - 1) / 2.0
+        h = 2 * cutoff * np.sinc(2 * cutoff * t) * np.kaiser(n, KAISER_BETA) * self.up
+        # phases[p, k] = h[p + k * up]; reversed in k so it lines up with a forward input window
+        self.phases = h.reshape(self.taps, self.up).T[:, ::-1].astype(np.float32)
+
+        self.history = np.zeros(self.taps - 1, dtype=np.float32)
+        self.start = -(self.taps - 1)   # absolute input index of history[0]
+        self.next_out = 0               # absolute index of the next output sample
+
+    def process(self, samples):
+        samples = np.asarray(samples, dtype=np.float32)
+        if self.passthrough:
+            return samples
+        buf = np.concatenate([self.history, samples])
+        last = self.start + len(buf) - 1
+        n_end = (last * self.up + self.up - 1) // self.down + 1
+        out_idx = np.arange(self.next_out, max(n_end, self.next_out), dtype=np.int64)
+
+        if len(out_idx):
+            pos = out_idx * self.down
+            base = pos // self.up
+            phase = pos % self.up
+            window = (base - self.start - (self.taps - 1))[:, None] + np.arange(self.taps)
+            out = np.einsum("nk,nk->n", self.phases[phase], buf[window])
+        else:
+            out = np.zeros(0, dtype=np.float32)
+
+        self.next_out += len(out_idx)
+        keep = self.taps - 1
+        self.history = buf[len(buf) - keep:]
+        self.start = last - keep + 1
+        return out.astype(np.float32)
+
+# === Format normalizer ===
+class AudioNormalizer:
+    """Turns client chunks (8-48 kHz, mono/stereo, int16/float32) into 16 kHz mono float32.
+
+    Stereo is downmixed by averaging channels, then resampled, then an
+    automatic gain control brings speech towards target_rms. Gain adapts only
+    on chunks above noise_floor, so silence is not amplified.
+    """
+
+    def __init__(self, rate, channels=1, dtype="int16", out_rate=TARGET_RATE,
+                 normalize_gain=True, target_rms=0.1, max_gain=8.0, noise_floor=0.003, smoothing=0.9):
+        if rate not in SUPPORTED_RATES:
+            raise ValueError(f"Unsupported sample rate: {rate}")
+        if channels not in (1, 2):
+            raise ValueError(f"Unsupported channel count: {channels}")
+        if dtype not in ("int16", "float32"):
+            raise ValueError(f"Unsupported sample format: {dtype}")
+        self.channels = channels
+        self.dtype = np.dtype(dtype)
+        self.resampler = StreamingResampler(rate, out_rate)
+        self.normalize_gain = normalize_gain
+        self.target_rms = target_rms
+        self.max_gain = max_gain
+        self.noise_floor = noise_floor
+        self.smoothing = smoothing
+        self.level = None
+        self.leftover = b""
+
+    def _to_float(self, chunk):
+        if isinstance(chunk, np.ndarray):
+            samples = chunk.reshape(-1)
+        else:
+            # Keep partial frames for the next chunk when bytes arrive unaligned
+            data = self.leftover + bytes(chunk)
+            frame = self.dtype.itemsize * self.channels
+            usable = len(data) - len(data) % frame
+            self.leftover = data[usable:]
+            samples = np.frombuffer(data[:usable], dtype=self.dtype)
+        if samples.dtype == np.int16:
+            samples = samples.astype(np.float32) / 32768.0
+        else:
+            samples = samples.astype(np.float32, copy=False)
+        if self.channels == 2:
+            samples = samples.reshape(-1, 2).mean(axis=1)
+        return samples
+
+    def _apply_gain(self, samples):
+        if len(samples) == 0:
+            return samples
+        rms = float(np.sqrt(np.mean(samples * samples)))
+        if rms > self.noise_floor:
+            self.level = rms if self.level is None else self.smoothing * self.level + (1 - self.smoothing) * rms
+        if self.level is None:
+            return samples
+        gain = min(self.max_gain, self.target_rms / self.level)
+        return np.clip(samples * gain, -1.0, 1.0)
+
+    def process(self, chunk):
+        samples = self.resampler.process(self._to_float(chunk))
+        if self.normalize_gain:
+            samples = self._apply_gain(samples)
+        return samples.astype(np.float32, copy=False)
+
+def to_int16_bytes(samples):
+    """float32 [-1, 1] -> int16 PCM bytes, the format Vosk and transcribe_whisper frames use."""
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
@@ -0,0 +1,141 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Dynamically get the project root directory (1 level above /utils/)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# === Config ===
+CACHE_DIR = os.environ.get("TRANSCRIPT_CACHE_DIR", os.path.join(BASE_DIR, "data", "cache", "transcripts"))
+MAX_DISK_BYTES = int(os.environ.get("TRANSCRIPT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+MAX_MEMORY_ENTRIES = 512
+HASH_BLOCK_SIZE = 1 << 20
+
+# Only these fields of a Whisper result are persisted
+STORED_FIELDS = ("text", "segments", "language")
+
+# === Keys ===
+def audio_digest(audio):
+    """sha256 of the audio content: a file path, raw PCM bytes, or a numpy array."""
+    h = hashlib.sha256()
+    if isinstance(audio, (str, os.PathLike)):
+        with open(audio, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                h.update(block)
+    elif isinstance(audio, np.ndarray):
+        h.update(f"{audio.dtype.str}{audio.shape}".encode())
+        h.update(np.ascontiguousarray(audio).tobytes())
+    else:
+        h.update(bytes(audio))
+    return h.hexdigest()
+
+def cache_key(audio, model_name, options):
+    spec = json.dumps({"audio": audio_digest(audio), "model": model_name, "options": options},
+                      sort_keys=True, default=str)
+    return hashlib.sha256(spec.encode()).hexdigest()
+
+# === Cache ===
+class TranscriptCache:
+    """Two-tier (memory + disk) LRU cache of Whisper results keyed by audio content, model and decode options."""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_disk_bytes=MAX_DISK_BYTES, max_memory_entries=MAX_MEMORY_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_entries = max_memory_entries
+        self.lock = threading.Lock()
+        self.memory = OrderedDict()
+        self.disk = OrderedDict()  # key -> file size, least recently used first
+        self.disk_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._scan_disk()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    def _scan_disk(self):
+        entries = []
+        if os.path.isdir(self.cache_dir):
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    if name.endswith(".json"):
+                        st = os.stat(os.path.join(root, name))
+                        entries.append((st.st_mtime, name[:-5], st.st_size))
+        for _, key, size in sorted(entries):
+            self.disk[key] = size
+            self.disk_bytes += size
+
+    def _remember(self, key, result):
+        self.memory[key] = result
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+
+    def _evict_disk(self):
+        while self.disk_bytes > self.max_disk_bytes and self.disk:
+            key, size = self.disk.popitem(last=False)
+            self.disk_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def get(self, key):
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return self.memory[key]
+            path = self._path(key)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    result = json.load(f)
+                os.utime(path)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self.misses += 1
+                return None
+            if key not in self.disk:  # written by another process
+                size = os.path.getsize(path)
+                self.disk[key] = size
+                self.disk_bytes += size
+            self.disk.move_to_end(key)
+            self._remember(key, result)
+            self.hits += 1
+            return result
+
+    def put(self, key, result):
+        entry = {k: result[k] for k in STORED_FIELDS if k in result}
+        data = json.dumps(entry, default=float).encode("utf-8")
+        path = self._path(key)
+        with self.lock:
+            self._remember(key, entry)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self.disk_bytes += len(data) - self.disk.pop(key, 0)
+            self.disk[key] = len(data)
+            self._evict_disk()
+        return entry
+
+    def transcribe(self, model, model_name, audio, **options):
+        """Drop-in for model.transcribe(audio, **options) that returns cached results for identical audio."""
+        key = cache_key(audio, model_name, options)
+        result = self.get(key)
+        if result is None:
+            result = self.put(key, model.transcribe(audio, **options))
+        return result
+
+_default_cache = None
+
+def get_cache():
+    """Process-wide cache shared by the batch script and the live paths."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = TranscriptCache()
+    return _default_cache